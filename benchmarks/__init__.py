@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+"""
+性能計測用のツール一式（リポジトリのルートから python -m で実行する）。
+
+  python -m benchmarks.seed   … 合成データの投入（ローカルの Postgres / SQLite）
+  python -m benchmarks.micro  … テストクライアントでの各エンドポイントのマイクロベンチマーク
+  python -m benchmarks.load   … 起動中のサーバーへの並列負荷（p50/p95/p99・SQL件数）
+
+micro / load は --save で結果をJSONに保存し、--compare で保存済みのベースラインと比較できる。
+"""
@@ -0,0 +1,141 @@
+# benchmarks/common.py
+"""ベンチマーク共通：集計・Server-Timing の解析・ベースラインの保存と比較"""
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def percentile(sorted_values, p):
+    """ソート済みリストの p パーセンタイル（最近傍順位法）"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def parse_server_timing(header):
+    """
+    instrumentation.py が付ける Server-Timing ヘッダーから (SQL件数, DB時間ms) を取り出す。
+    サーバー側で INSTRUMENTATION=1 になっていない場合は (None, None)。
+    """
+    match = _SERVER_TIMING_DB.search(header or "")
+    if not match:
+        return None, None
+    return int(match.group(2)), float(match.group(1))
+
+
+def summarize(latencies_ms, statements=(), errors=0):
+    """1シナリオ分の計測値をまとめる"""
+    values = sorted(latencies_ms)
+    counted = [s for s in statements if s is not None]
+    return {
+        "n": len(values),
+        "errors": errors,
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": _round(percentile(values, 50)),
+        "p95_ms": _round(percentile(values, 95)),
+        "p99_ms": _round(percentile(values, 99)),
+        "max_ms": _round(values[-1] if values else None),
+        "statements": round(sum(counted) / len(counted), 2) if counted else None,
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def run_metadata(kind, **extra):
+    """結果JSONに残す実行環境の情報"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    meta = {
+        "kind": kind,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": _database_kind(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def _database_kind():
+    url = os.environ.get("DATABASE_URL", "")
+    return url.split(":", 1)[0] if url else "default"
+
+
+def print_table(scenarios):
+    header = f"{'scenario':<28}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}{'sql/req':>9}{'err':>5}"
+    print(header)
+    print("-" * len(header))
+    for name, s in scenarios.items():
+        print(f"{name:<28}{s['n']:>6}{_fmt(s['p50_ms'])}{_fmt(s['p95_ms'])}{_fmt(s['p99_ms'])}"
+              f"{_fmt(s['mean_ms'])}{_fmt(s['statements'], 9, 1)}{s['errors']:>5}")
+
+
+def _fmt(value, width=10, digits=2):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+
+def save_results(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 saved: {path}")
+
+
+def compare_results(results, baseline_path, tolerance_pct):
+    """
+    保存済みベースラインと p50/p95 と SQL件数を比較して表示する。
+    p95 が tolerance_pct を超えて悪化したか、SQL件数が 0.5件/req 以上増えたシナリオがあれば False を返す。
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    base_meta = baseline.get("meta", {})
+    print(f"\n📊 baseline: {baseline_path} (commit {base_meta.get('commit')}, {base_meta.get('timestamp')})")
+    print(f"{'scenario':<28}{'p50 Δ%':>10}{'p95 Δ%':>10}{'sql/req':>16}")
+
+    ok = True
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<28}{'(new)':>10}")
+            continue
+        p50 = _delta_pct(base.get("p50_ms"), current["p50_ms"])
+        p95 = _delta_pct(base.get("p95_ms"), current["p95_ms"])
+        sql = f"{_fmt_count(base.get('statements'))} → {_fmt_count(current['statements'])}"
+        regressed = (p95 is not None and p95 > tolerance_pct) or (
+            base.get("statements") is not None and current["statements"] is not None
+            and current["statements"] >= base["statements"] + 0.5
+        )
+        ok = ok and not regressed
+        print(f"{name:<28}{_fmt_pct(p50)}{_fmt_pct(p95)}{sql:>16}{'  ⚠️' if regressed else ''}")
+    return ok
+
+
+def _delta_pct(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def _fmt_pct(value):
+    return f"{'-':>10}" if value is None else f"{value:>+10.1f}"
+
+
+def _fmt_count(value):
+    return "-" if value is None else f"{value:g}"
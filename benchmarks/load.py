@@ -0,0 +1,165 @@
+# benchmarks/load.py
+"""
+起動中のサーバーに複数スレッドから同時にリクエストを送る負荷ドライバー。
+シナリオごとの p50/p95/p99・エラー数・スループットと、1リクエストあたりのSQL件数を出す。
+
+SQL件数はサーバーが返す Server-Timing から取るので、サーバーは INSTRUMENTATION=1 で起動する。
+書き込み対象の選定にDBを直接読むため、DATABASE_URL はサーバーと同じ接続先にする。
+
+例:
+  INSTRUMENTATION=1 gunicorn -c gunicorn.conf.py app:app
+  python -m benchmarks.load --url http://127.0.0.1:5000 --concurrency 20 --duration 60
+  python -m benchmarks.load --url http://127.0.0.1:5000 --read-only --save benchmarks/results/load.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+from app import app, db, Admin
+from benchmarks.common import (summarize, parse_server_timing, print_table, run_metadata,
+                               save_results, compare_results)
+from benchmarks.scenarios import WRITE_SCENARIOS, pick_targets, ScenarioBuilder
+from benchmarks.seed import BENCH_PASSWORD
+
+# シナリオの出現比率（ダッシュボード閲覧中心の想定）
+DEFAULT_MIX = {
+    "dashboard_week": 15,
+    "grid_week": 25,
+    "grid_day": 10,
+    "grid_month": 5,
+    "report_current": 10,
+    "report_closed": 10,
+    "update_status": 20,
+    "update_user_status_all": 4,
+    "update_status_bulk": 1,
+}
+
+
+class Worker(threading.Thread):
+    def __init__(self, base_url, account, password, builder, mix, deadline, timeout):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.account = account
+        self.password = password
+        self.builder = builder
+        self.names, self.weights = list(mix), list(mix.values())
+        self.deadline = deadline
+        self.timeout = timeout
+        self.rng = random.Random()
+        self.samples = []  # (scenario, latency_ms, statements, ok)
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def login(self):
+        form = urllib.parse.urlencode({"account_id": self.account, "password": self.password}).encode()
+        with self.opener.open(self.base_url + "/login", data=form, timeout=self.timeout) as response:
+            if response.url.rstrip("/").endswith("/login"):
+                raise RuntimeError(f"login failed: {self.account}")
+
+    def request(self, method, path, body):
+        data, headers = None, {}
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Server-Timing")
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            return None, None
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            method, path, body = self.builder.build(name)
+            started = time.perf_counter()
+            status, server_timing = self.request(method, path, body)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            ok = status is not None and status < 400
+            self.samples.append((name, elapsed_ms, parse_server_timing(server_timing)[0], ok))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動中のサーバーへの並列負荷テスト")
+    parser.add_argument("--url", required=True, help="サーバーのURL（プレフィックス込み 例: http://127.0.0.1:5000）")
+    parser.add_argument("--account", default="bench_admin_1")
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=10, help="同時に動かすクライアント数")
+    parser.add_argument("--duration", type=float, default=30.0, help="計測時間（秒）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--read-only", action="store_true", help="書き込み系のシナリオを混ぜない")
+    parser.add_argument("--save", metavar="PATH", help="結果をJSONで保存する")
+    parser.add_argument("--compare", metavar="PATH", help="保存済みのベースラインと比較する")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="p95 の悪化を許容する割合（%%）")
+    args = parser.parse_args()
+
+    with app.app_context():
+        admin = db.session.get(Admin, args.account)
+        if admin is None:
+            sys.exit(f"❌ アカウントがありません: {args.account}（benchmarks.seed を実行してください）")
+        targets = pick_targets(admin.account_id, admin.role)
+        db.session.remove()
+
+    mix = {name: w for name, w in DEFAULT_MIX.items() if not (args.read_only and name in WRITE_SCENARIOS)}
+    # ScenarioBuilder の itertools.count は複数スレッドから呼んでも値が重複しない
+    builder = ScenarioBuilder(targets)
+    deadline = time.monotonic() + args.duration
+    workers = [Worker(args.url, args.account, args.password, builder, mix, deadline, args.timeout)
+               for _ in range(args.concurrency)]
+    for worker in workers:
+        worker.login()
+
+    print(f"🚀 {args.concurrency} clients × {args.duration:.0f}s → {args.url}", flush=True)
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    by_scenario = {}
+    for worker in workers:
+        for name, latency_ms, statements, ok in worker.samples:
+            entry = by_scenario.setdefault(name, ([], [], [0]))
+            entry[0].append(latency_ms)
+            entry[1].append(statements)
+            entry[2][0] += 0 if ok else 1
+    scenarios = {
+        name: summarize(latencies, statements, errors[0])
+        for name, (latencies, statements, errors) in sorted(by_scenario.items())
+    }
+    total = sum(s["n"] for s in scenarios.values())
+    all_latencies = [latency for w in workers for _, latency, _, _ in w.samples]
+    all_statements = [statements for w in workers for _, _, statements, _ in w.samples]
+    overall = summarize(all_latencies, all_statements, sum(s["errors"] for s in scenarios.values()))
+    overall["throughput_rps"] = round(total / elapsed, 2) if elapsed else None
+
+    results = {
+        "meta": run_metadata("load", url=args.url, account=args.account, concurrency=args.concurrency,
+                             duration=args.duration, read_only=args.read_only),
+        "overall": overall,
+        "scenarios": scenarios,
+    }
+    print()
+    print_table(scenarios)
+    print(f"\n合計 {total} req / {elapsed:.1f}s = {overall['throughput_rps']} req/s, "
+          f"p50 {overall['p50_ms']} / p95 {overall['p95_ms']} / p99 {overall['p99_ms']} ms, "
+          f"SQL {overall['statements']} /req, errors {overall['errors']}")
+    if args.save:
+        save_results(args.save, results)
+    if args.compare and not compare_results(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/micro.py
+"""
+Flask のテストクライアントで各エンドポイントを直接呼ぶマイクロベンチマーク。
+ネットワークやワーカー数の影響を除いた、1リクエストあたりの処理時間とSQL件数を測る。
+
+例:
+  python -m benchmarks.micro --iterations 50
+  python -m benchmarks.micro --save benchmarks/results/baseline.json
+  python -m benchmarks.micro --compare benchmarks/results/baseline.json
+
+レポートはサーバー側キャッシュを毎回クリアして測る（report_*）。
+キャッシュに当たった場合は report_*_cached として別に測る。
+"""
+import argparse
+import os
+import sys
+import time
+
+# SQL件数は instrumentation.py の Server-Timing から取るので、app を読み込む前に有効化する
+os.environ.setdefault("INSTRUMENTATION", "1")
+os.environ.setdefault("SLOW_REQUEST_MS", "600000")
+
+from app import app, db, Admin, report_cache  # noqa: E402
+from benchmarks.common import (summarize, parse_server_timing, print_table, run_metadata,  # noqa: E402
+                               save_results, compare_results)
+from benchmarks.scenarios import READ_SCENARIOS, WRITE_SCENARIOS, pick_targets, ScenarioBuilder  # noqa: E402
+from benchmarks.seed import SUPER_ADMIN_ID, BENCH_PASSWORD  # noqa: E402
+
+CACHED_REPORTS = ("report_current", "report_closed")
+
+
+def login(client, account_id, password):
+    response = client.post("/login", data={"account_id": account_id, "password": password})
+    if response.status_code != 302:
+        sys.exit(f"❌ ログインできません: {account_id}")
+
+
+def measure(client, builder, name, iterations, warmup, clear_report_cache):
+    latencies, statements, errors = [], [], 0
+    for i in range(warmup + iterations):
+        method, path, body = builder.build(name)
+        if clear_report_cache:
+            report_cache.clear()
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        if response.status_code >= 400:
+            errors += 1
+        latencies.append(elapsed_ms)
+        statements.append(parse_server_timing(response.headers.get("Server-Timing"))[0])
+    return summarize(latencies, statements, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エンドポイント単位のマイクロベンチマーク")
+    parser.add_argument("--account", default="bench_admin_1", help=f"ログインするアカウント（全件は {SUPER_ADMIN_ID}）")
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="実行するシナリオ名（既定: 全部）")
+    parser.add_argument("--no-writes", action="store_true", help="書き込み系のシナリオを実行しない")
+    parser.add_argument("--save", metavar="PATH", help="結果をJSONで保存する")
+    parser.add_argument("--compare", metavar="PATH", help="保存済みのベースラインと比較する")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="p95 の悪化を許容する割合（%%）")
+    args = parser.parse_args()
+
+    with app.app_context():
+        admin = db.session.get(Admin, args.account)
+        if admin is None:
+            sys.exit(f"❌ アカウントがありません: {args.account}（benchmarks.seed を実行してください）")
+        targets = pick_targets(admin.account_id, admin.role)
+        db.session.remove()
+
+    names = list(READ_SCENARIOS) + [f"{n}_cached" for n in CACHED_REPORTS]
+    if not args.no_writes:
+        names += WRITE_SCENARIOS
+    if args.only:
+        names = [n for n in names if n in args.only]
+
+    client = app.test_client()
+    login(client, args.account, args.password)
+    builder = ScenarioBuilder(targets)
+
+    scenarios = {}
+    for name in names:
+        cached = name.endswith("_cached")
+        base_name = name[:-len("_cached")] if cached else name
+        scenarios[name] = measure(client, builder, base_name, args.iterations, args.warmup,
+                                  clear_report_cache=base_name in CACHED_REPORTS and not cached)
+        print(f"  {name}: p50 {scenarios[name]['p50_ms']} ms", flush=True)
+
+    results = {
+        "meta": run_metadata("micro", account=args.account, iterations=args.iterations),
+        "scenarios": scenarios,
+    }
+    print()
+    print_table(scenarios)
+    if args.save:
+        save_results(args.save, results)
+    if args.compare and not compare_results(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
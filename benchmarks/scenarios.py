@@ -0,0 +1,88 @@
+# benchmarks/scenarios.py
+"""micro / load 共通の計測シナリオ（対象の選定とリクエストの組み立て）"""
+from datetime import timedelta
+from itertools import count
+
+from app import db, User, Task, jst_today
+from config import SYSTEM_START_DATE
+
+# 書き込み系で使う日数（今日から遡る）
+WRITE_DAYS = 7
+# update_status_bulk でまとめて更新するユーザー数
+BULK_USERS = 5
+
+READ_SCENARIOS = (
+    "dashboard_day", "dashboard_week", "dashboard_month",
+    "grid_day", "grid_week", "grid_month",
+    "report_current", "report_closed",
+)
+WRITE_SCENARIOS = ("update_status", "update_user_status_all", "update_status_bulk")
+
+
+def pick_targets(account_id, role):
+    """
+    書き込みシナリオの対象（アカウントが閲覧できるユーザーとそのタスク、過去 WRITE_DAYS 日）を選ぶ。
+    app_context 内で呼ぶこと。
+    """
+    query = db.session.query(Task.user_id, Task.taskkey).join(User, User.userid == Task.user_id) \
+        .filter(User.is_deleted.is_(False))
+    if role != "super_admin":
+        query = query.filter(User.admin_id == account_id)
+    tasks_by_user = {}
+    for user_id, taskkey in query.order_by(Task.user_id, Task.taskkey):
+        tasks_by_user.setdefault(user_id, []).append(taskkey)
+    if not tasks_by_user:
+        raise SystemExit(f"❌ {account_id} が閲覧できるタスクがありません（benchmarks.seed を実行してください）")
+
+    today = jst_today()
+    days = [today - timedelta(days=i) for i in range(WRITE_DAYS)]
+    days = [d.isoformat() for d in days if d >= SYSTEM_START_DATE]
+    if not days:
+        raise SystemExit("❌ システム開始日以降の日付がありません（config.SYSTEM_START_DATE を確認してください）")
+    return {"tasks_by_user": tasks_by_user, "days": days, "today": today}
+
+
+class ScenarioBuilder:
+    """シナリオ名から (method, path, json) を組み立てる。書き込みは 済/休 を交互に書いて毎回実際に更新させる"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.user_ids = list(targets["tasks_by_user"])
+        self.counter = count()
+        today = targets["today"]
+        closed = today.replace(day=1) - timedelta(days=1)
+        self.report_months = {
+            "report_current": (today.year, today.month),
+            "report_closed": (closed.year, closed.month),
+        }
+
+    def build(self, name):
+        n = next(self.counter)
+        status = 1 if n % 2 == 0 else 2
+        if name.startswith("dashboard_"):
+            return "GET", f"/dashboard?view={name.split('_')[1]}", None
+        if name.startswith("grid_"):
+            return "GET", f"/api/dashboard/grid?view={name.split('_')[1]}", None
+        if name in self.report_months:
+            year, month = self.report_months[name]
+            return "GET", f"/report/monthly?year={year}&month={month}", None
+
+        days = self.targets["days"]
+        user_id = self.user_ids[n % len(self.user_ids)]
+        task_ids = self.targets["tasks_by_user"][user_id]
+        if name == "update_status":
+            return "POST", "/update_status", {
+                "taskkey": task_ids[n % len(task_ids)], "day": days[n % len(days)], "status": status,
+            }
+        if name == "update_user_status_all":
+            return "POST", "/update_user_status_all", {
+                "user_id": user_id, "task_ids": task_ids, "days": days, "status": status,
+            }
+        if name == "update_status_bulk":
+            start = n % len(self.user_ids)
+            picked = (self.user_ids[start:] + self.user_ids[:start])[:BULK_USERS]
+            return "POST", "/update_status_bulk", {
+                "status": status, "days": days,
+                "users": [{"user_id": uid, "task_ids": self.targets["tasks_by_user"][uid]} for uid in picked],
+            }
+        raise ValueError(f"unknown scenario: {name}")
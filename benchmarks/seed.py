@@ -0,0 +1,149 @@
+# benchmarks/seed.py
+"""
+ベンチマーク用の合成データを投入する。
+app.py のモデルと generate_tasks.provision_tasks をそのまま使うので、
+本番と同じテーブル構成・インデックスに対して計測できる。
+
+例:
+  DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.seed --reset
+  python -m benchmarks.seed --admins 10 --users-per-admin 30 --task-names 12 --months 12
+
+作成されるログイン（パスワードはすべて BENCH_PASSWORD）:
+  bench_root（super_admin）、bench_admin_1 〜 bench_admin_N（admin）
+"""
+import argparse
+import calendar
+import random
+import sys
+import time
+from datetime import date, timedelta
+from urllib.parse import urlparse
+
+from app import (app, db, Admin, User, TaskName, Task, TaskStatus, upsert_insert,
+                 jst_today, rebuild_monthly_rollup, bump_cache_versions)
+from generate_tasks import provision_tasks
+
+BENCH_PASSWORD = "bench"
+SUPER_ADMIN_ID = "bench_root"
+# 1回の INSERT で投入するステータス行数
+BATCH_SIZE = 5000
+# 埋めたセルのステータス分布（1:済 / 2:休 / 3:無 / 0:未）
+STATUS_WEIGHTS = {1: 70, 2: 15, 3: 5, 0: 10}
+# --reset（全テーブルの作り直し）を許可する接続先
+RESETTABLE_HOSTS = ("localhost", "127.0.0.1", "::1", None)
+
+
+def admin_ids(admins):
+    return [f"bench_admin_{i}" for i in range(1, admins + 1)]
+
+
+def first_seed_day(months, today):
+    """today を含む月から遡って months か月分の初日"""
+    year, month = today.year, today.month - (months - 1)
+    while month < 1:
+        year, month = year - 1, month + 12
+    return date(year, month, 1)
+
+
+def reset_schema():
+    url = urlparse(str(db.engine.url))
+    if db.engine.dialect.name != "sqlite" and url.hostname not in RESETTABLE_HOSTS:
+        sys.exit(f"❌ --reset はローカルのDBでのみ実行できます（接続先: {url.hostname}）")
+    db.drop_all()
+    db.create_all()
+
+
+def seed_accounts(admins, users_per_admin, groups_per_admin, task_names):
+    ids = admin_ids(admins)
+    db.session.add(Admin(account_id=SUPER_ADMIN_ID, name="ベンチ管理者",
+                         account_password=BENCH_PASSWORD, role="super_admin"))
+    db.session.add_all(
+        Admin(account_id=admin_id, name=f"ベンチ{i}", account_password=BENCH_PASSWORD, role="admin")
+        for i, admin_id in enumerate(ids, start=1)
+    )
+    db.session.flush()
+    db.session.execute(User.__table__.insert(), [
+        {
+            "name": f"ユーザー{a:02d}-{u:03d}",
+            # 一部のユーザーはグループ未設定（レポートの「その他」）
+            "group": f"グループ{a:02d}-{u % groups_per_admin + 1}" if u % 10 else None,
+            "admin_id": admin_id,
+            "is_deleted": False,
+        }
+        for a, admin_id in enumerate(ids, start=1)
+        for u in range(1, users_per_admin + 1)
+    ])
+    db.session.add_all(TaskName(name=f"タスク{n:02d}") for n in range(1, task_names + 1))
+    db.session.commit()
+    # ユーザー × タスク名 の割り当ては本番と同じ処理で作る
+    return provision_tasks()
+
+
+def seed_statuses(start_day, end_day, fill, rng):
+    """start_day〜end_day の各タスク・各日を確率 fill で埋める"""
+    tasks = db.session.query(Task.taskkey, Task.user_id).order_by(Task.taskkey).all()
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+    insert = upsert_insert(TaskStatus.__table__).on_conflict_do_nothing(
+        index_elements=["user_id", "task_id", "date"]
+    )
+
+    batch = []
+    inserted = 0
+    for taskkey, user_id in tasks:
+        for day in days:
+            if rng.random() >= fill:
+                continue
+            batch.append({"user_id": user_id, "task_id": taskkey, "date": day,
+                          "status": rng.choices(statuses, weights)[0]})
+            if len(batch) >= BATCH_SIZE:
+                inserted += len(batch)
+                db.session.execute(insert, batch)
+                db.session.commit()
+                batch = []
+                print(f"TaskStatus inserted: {inserted}")
+    if batch:
+        inserted += len(batch)
+        db.session.execute(insert, batch)
+        db.session.commit()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成データを投入する")
+    parser.add_argument("--admins", type=int, default=5, help="admin アカウント数")
+    parser.add_argument("--users-per-admin", type=int, default=20, help="admin ごとのユーザー数")
+    parser.add_argument("--groups-per-admin", type=int, default=3, help="admin ごとのグループ数")
+    parser.add_argument("--task-names", type=int, default=8, help="タスク名の数（全ユーザーに割り当て）")
+    parser.add_argument("--months", type=int, default=6, help="当月から遡るステータスの月数")
+    parser.add_argument("--fill", type=float, default=0.8, help="ステータスを埋めるセルの割合（0〜1）")
+    parser.add_argument("--seed", type=int, default=1, help="乱数シード（同じ値なら同じデータ）")
+    parser.add_argument("--reset", action="store_true", help="全テーブルを作り直してから投入する（ローカルDBのみ）")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.reset:
+        reset_schema()
+    elif db.session.get(Admin, SUPER_ADMIN_ID) is not None:
+        sys.exit("❌ すでに投入済みです。作り直す場合は --reset を指定してください")
+
+    tasks_created = seed_accounts(args.admins, args.users_per_admin, args.groups_per_admin, args.task_names)
+
+    today = jst_today()
+    start_day = first_seed_day(args.months, today)
+    end_day = date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+    inserted = seed_statuses(start_day, min(end_day, today), args.fill, random.Random(args.seed))
+
+    rollup_rows = rebuild_monthly_rollup()
+    bump_cache_versions(["global"])
+    db.session.commit()
+
+    print(f"✅ Seeded: {args.admins} admins, {args.admins * args.users_per_admin} users, "
+          f"{tasks_created} tasks, {inserted} statuses ({start_day}〜{min(end_day, today)}), "
+          f"{rollup_rows} rollup rows in {time.perf_counter() - started:.1f}s")
+    print(f"   login: {SUPER_ADMIN_ID} / bench_admin_1..{args.admins}  password: {BENCH_PASSWORD}")
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        main()
@@ -0,0 +1,74 @@
+# compression.py
+"""
+レスポンス本文の gzip / brotli 圧縮（Accept-Encoding に応じて選ぶ）。
+
+HTML・JSON・CSV 以外のテキストも含め、min_size 以上の通常レスポンスだけを圧縮する。
+ストリーミング（SSE・CSVエクスポート）は送信しながら生成するので対象外。
+brotli は Brotli パッケージが入っている場合だけ使う。
+
+圧縮した場合は ETag を弱い ETag（W/"..."）にする（本文のバイト列が変わるため）。
+If-None-Match は弱い比較（contains_weak）で判定すること。
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # 任意依存
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "application/javascript",
+    "text/javascript",
+    "application/json",
+}
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encodings):
+    """request.accept_encodings から使う圧縮方式（"br" / "gzip" / None）を選ぶ"""
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def init_app(app, min_size=MIN_SIZE):
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add("Accept-Encoding")
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code != 200
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,3 +1,91 @@
 # config.py
+import os
 from datetime import date
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
 SYSTEM_START_DATE = date(2025, 10, 20)
+
+# --- DB接続プール ---
+# DB_POOL_PROFILE で選ぶ（未指定時は接続先のポートから判定）
+#   transaction : Supabase トランザクションプーラー（6543番 / pgbouncer transaction モード）。
+#                 プーラーへのクライアント接続は安いので、ワーカーごとに少し多めに持って使い回す
+#   session     : 直結（5432番）やセッションプーラー。DBの接続を直接占有するので小さめにする
+#   nullpool    : アプリ側でプールしない（リクエストごとにプーラーへ接続）。単発のスクリプト向け
+#   default     : SQLAlchemy の既定値のまま
+# 大きさは DB_POOL_SIZE / DB_MAX_OVERFLOW で上書きできる。
+# 「ワーカー数 × (DB_POOL_SIZE + DB_MAX_OVERFLOW)」が接続先の上限を超えないようにすること。
+POOL_SIZE_DEFAULTS = {
+    "transaction": (5, 10),  # (pool_size, max_overflow)
+    "session": (3, 2),
+}
+TRANSACTION_POOLER_PORT = 6543
+
+
+def normalize_database_url(url):
+    """
+    ドライバを requirements.txt に入っている psycopg2 に固定する。
+    （SQLAlchemy 2.1 以降は postgresql:// を psycopg(v3) と解釈するため。postgres:// も受け付ける）
+    """
+    parsed = make_url(url.replace("postgres://", "postgresql://", 1) if url.startswith("postgres://") else url)
+    if parsed.drivername == "postgresql":
+        parsed = parsed.set(drivername="postgresql+psycopg2")
+    return parsed.render_as_string(hide_password=False)
+
+
+def db_pool_profile(url):
+    profile = os.environ.get("DB_POOL_PROFILE")
+    if profile:
+        return profile
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return "default"
+    return "transaction" if parsed.port == TRANSACTION_POOLER_PORT else "session"
+
+
+def supports_listen(url):
+    """
+    接続先で LISTEN できるか。トランザクションプーラー（6543番）はトランザクションごとに
+    サーバー接続が変わるので LISTEN が効かない。DB_POOL_PROFILE の指定ではなく実際の接続先で判定する
+    """
+    return make_url(url).port != TRANSACTION_POOLER_PORT
+
+
+def engine_options(url, profile):
+    """SQLALCHEMY_ENGINE_OPTIONS に渡すエンジン設定"""
+    parsed = make_url(url)
+    if profile == "default" or parsed.get_backend_name() != "postgresql":
+        return {}
+    if profile not in ("transaction", "session", "nullpool"):
+        raise ValueError(f"unknown DB_POOL_PROFILE: {profile}")
+
+    connect_args = {"connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 10))}
+    if parsed.get_driver_name() == "psycopg" and profile != "session":
+        # psycopg(v3) は同じSQLを5回実行するとサーバー側で PREPARE する。
+        # トランザクションプーラーでは次の実行が別のサーバー接続に回って
+        # 「prepared statement does not exist」になるため無効化する（psycopg2 は PREPARE しない）
+        connect_args["prepare_threshold"] = None
+
+    options = {
+        "connect_args": connect_args,
+        # SQLAlchemy 側のSQLコンパイル結果のキャッシュ（クライアント側のみ。サーバーには影響しない）
+        "query_cache_size": int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 500)),
+    }
+    if profile == "nullpool":
+        options["poolclass"] = NullPool
+        return options
+
+    pool_size, max_overflow = POOL_SIZE_DEFAULTS[profile]
+    options.update(
+        pool_size=int(os.environ.get("DB_POOL_SIZE", pool_size)),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", max_overflow)),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # 長時間アイドルの接続は作り直す（プーラー・LB側のアイドル切断より短くする）
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        # プーラーの再起動などで切れた接続を借りる前に検出する
+        pool_pre_ping=True,
+        # 直近に使った接続から再利用し、余った接続は recycle で自然に減らす
+        pool_use_lifo=True,
+    )
+    return options
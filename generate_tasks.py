@@ -1,23 +1,71 @@
-from app import app, db, User, TaskName, Task
+import argparse
+
+from app import app, db, User, TaskName, Task, upsert_insert, bump_cache_versions
+
+# 1回の INSERT / コミットで作成するタスク数（トランザクションを短く保つ）
+BATCH_SIZE = 1000
+
+def find_missing_tasks(user_id=None, task_name_id=None):
+    """
+    まだ割り当てられていない (user_id, タスク名) の組を
+    ユーザー × タスク名 と task の anti-join 1回で求める。
+    順序はユーザーは userid 昇順、タスク名は taskkey 昇順（＝ダッシュボードの表示順）。
+    """
+    query = (
+        db.session.query(User.userid, TaskName.name)
+        .select_from(User)
+        .join(TaskName, db.true())
+        .outerjoin(Task, db.and_(Task.user_id == User.userid, Task.name == TaskName.name))
+        .filter(User.is_deleted.is_(False), Task.taskkey.is_(None))
+    )
+    if user_id is not None:
+        query = query.filter(User.userid == user_id)
+    if task_name_id is not None:
+        query = query.filter(TaskName.taskkey == task_name_id)
+    # 同名の TaskName が複数あっても1件にまとめる
+    return query.group_by(User.userid, TaskName.name).order_by(
+        User.userid.asc(), db.func.min(TaskName.taskkey).asc()
+    ).all()
+
+def provision_tasks(user_id=None, task_name_id=None):
+    """
+    未割り当てのタスクをまとめて作成し、作成件数を返す。
+    user_id / task_name_id を指定すると、そのユーザー・タスク名の分だけを作成する（追加時用）。
+    task(user_id, name) の一意制約と ON CONFLICT DO NOTHING により、同時に実行しても重複しない。
+    """
+    missing = find_missing_tasks(user_id, task_name_id)
+    created = 0
+    for i in range(0, len(missing), BATCH_SIZE):
+        chunk = [{"user_id": uid, "name": name} for uid, name in missing[i:i + BATCH_SIZE]]
+        stmt = upsert_insert(Task.__table__).values(chunk).on_conflict_do_nothing(
+            index_elements=["user_id", "name"]
+        )
+        created += db.session.execute(stmt).rowcount
+        db.session.commit()
+        print(f"Tasks created: {created} / {len(missing)}")
+
+    if created:
+        # タスク構成が変わったのでレポートキャッシュを無効化
+        bump_cache_versions(["global"])
+        db.session.commit()
+    return created
 
 def generate_tasks_for_all_users():
-    # ユーザーは userid 昇順
-    users = User.query.filter(User.is_deleted.is_(False)).order_by(User.userid.asc()).all()
-    # タスク名は taskkey 昇順
-    task_names = TaskName.query.order_by(TaskName.taskkey.asc()).all()
-
-    for user in users:
-        for task_name in task_names:
-            # すでに同じタスクがユーザーに割り当てられていないか確認
-            exists = Task.query.filter_by(user_id=user.userid, name=task_name.name).first()
-            if not exists:
-                task = Task(user_id=user.userid, name=task_name.name)
-                db.session.add(task)
-                print(f"Task created: {task_name.name} for user {user.name}")
-
-    db.session.commit()
-    print("✅ All tasks generated successfully!")
+    created = provision_tasks()
+    print(f"✅ All tasks generated successfully! ({created} created)")
+
+def main():
+    parser = argparse.ArgumentParser(description="ユーザー × タスク名 の未割り当てタスクを作成する")
+    parser.add_argument("--user-id", type=int, help="追加したユーザーの分だけ作成する")
+    parser.add_argument("--task-name-id", type=int, help="追加したタスク名（TaskName.taskkey）の分だけ作成する")
+    args = parser.parse_args()
+
+    if args.user_id is None and args.task_name_id is None:
+        generate_tasks_for_all_users()
+    else:
+        created = provision_tasks(args.user_id, args.task_name_id)
+        print(f"✅ Tasks generated successfully! ({created} created)")
 
 if __name__ == "__main__":
     with app.app_context():
-        generate_tasks_for_all_users()
+        main()
@@ -0,0 +1,61 @@
+# gunicorn.conf.py
+# SSE（/api/dashboard/stream）は接続を張りっぱなしにするため、同期ワーカーではなく
+# gevent ワーカーで1ワーカーあたり多数の接続を扱う。
+# DB接続プールの設定は config.py（DB_POOL_PROFILE など）。
+import os
+
+bind = "0.0.0.0:" + os.environ.get("PORT", "5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # psycopg2 の通信を gevent に協調させる（これが無いとクエリ中にワーカー全体が止まる）
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def post_worker_init(worker):
+    # 最初のリクエストで接続待ちにならないよう、ワーカー起動時にDB接続を張っておく
+    from app import warm_up_db_pool, db_pool_stats, status_hub
+    try:
+        stats = warm_up_db_pool()
+        worker.log.info("DB pool warmed up: %s", stats)
+    except Exception as e:
+        worker.log.warning("DB pool warm-up failed: %s", e)
+
+    # 管理者の変更通知（キャッシュ破棄）を受け取るための LISTEN 接続を開く
+    status_hub.start()
+
+    # DB_POOL_LOG_INTERVAL（秒）を指定すると接続プールの状態を定期的にログに出す
+    interval = float(os.environ.get("DB_POOL_LOG_INTERVAL", 0))
+    if interval > 0:
+        import threading
+        import time
+
+        def log_pool_stats():
+            while True:
+                time.sleep(interval)
+                worker.log.info("DB pool: %s", db_pool_stats())
+
+        threading.Thread(target=log_pool_stats, name="db-pool-stats", daemon=True).start()
+
+
+def when_ready(server):
+    # ワーカー数 × プール上限 が DB（プーラー）の接続上限に収まっているかの目安
+    from config import engine_options, db_pool_profile, normalize_database_url
+    url = normalize_database_url(os.environ.get("DATABASE_URL", "postgresql://localhost/task_manager"))
+    profile = db_pool_profile(url)
+    options = engine_options(url, profile)
+    if "pool_size" in options:
+        per_worker = options["pool_size"] + options["max_overflow"]
+        server.log.info("DB pool profile=%s: up to %d connections (%d workers × %d)",
+                        profile, workers * per_worker, workers, per_worker)
+    elif "poolclass" in options:
+        server.log.info("DB pool profile=%s: connections are opened per request", profile)
+    else:
+        server.log.info("DB pool profile=%s: SQLAlchemy defaults", profile)
@@ -0,0 +1,53 @@
+import argparse
+import csv
+import json
+import sys
+
+from app import app, db, import_task_statuses
+
+# ステータス履歴の CSV（列: ユーザーID, タスク, 日付, ステータス）を taskstatus に一括登録する。
+# /export/status_history.csv の出力はそのまま取り込める。
+#   python import_statuses.py backfill.csv
+#   python import_statuses.py backfill.csv --dry-run --rejected-out rejected.csv
+
+def main():
+    parser = argparse.ArgumentParser(description="ステータス履歴の CSV を taskstatus に一括登録する")
+    parser.add_argument("csv_path", help="取り込む CSV（UTF-8、BOM 可）。- で標準入力")
+    parser.add_argument("--dry-run", action="store_true", help="検証と件数の集計だけを行い、保存しない")
+    parser.add_argument("--rejected-out", help="却下した行を理由つきで書き出す CSV のパス")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.csv_path == "-" else open(args.csv_path, encoding="utf-8-sig", newline="")
+    rejected_file = open(args.rejected_out, "w", encoding="utf-8-sig", newline="") if args.rejected_out else None
+    rejected_writer = csv.writer(rejected_file) if rejected_file else None
+    if rejected_writer:
+        rejected_writer.writerow(["行", "理由", "内容"])
+
+    def on_reject(line, row, reason):
+        if rejected_writer:
+            rejected_writer.writerow([line, reason, *row])
+
+    try:
+        summary = import_task_statuses(source, on_reject=on_reject)
+        if args.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        parser.exit(1, f"❌ {e}\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if rejected_file:
+            rejected_file.close()
+
+    summary.pop("rejected_rows")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    label = "Dry run" if args.dry_run else "Imported"
+    print(f"✅ {label}: {summary['written']} cells written, {summary['unchanged']} unchanged, "
+          f"{summary['rejected']} rows rejected")
+
+if __name__ == "__main__":
+    with app.app_context():
+        main()
@@ -0,0 +1,247 @@
+# instrumentation.py
+"""
+リクエスト単位の計測（INSTRUMENTATION=1 のときだけ有効）。
+
+1リクエストごとに
+  - SQL文の件数と合計DB時間（SQLAlchemy エンジンのイベント）
+  - テンプレート描画時間（Flask のテンプレートシグナル）
+  - 全体の処理時間
+を集計し、Server-Timing ヘッダーに付ける。閾値を超えたリクエストは構造化ログ
+（ロガー task_manager.slow_request、1行1JSON）に出力し、ルート別のヒストグラムを
+/metrics（Prometheus テキスト形式）で公開する。
+
+ヒストグラムはワーカープロセスごとの値（pid ラベル付き）で、ステータスコードの種類（2xx〜5xx）でも分ける。
+処理中の例外で 500 になったリクエストも teardown で記録する。
+ストリーミングのレスポンス（CSV）は本体を送り終えた時点で記録し、SSE は接続時間になるので記録しない。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, abort, before_render_template, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_logger = logging.getLogger("task_manager.slow_request")
+
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SQL_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for upper, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{upper}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.3f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RouteMetrics:
+    """(ルート, メソッド, ステータスの種類) ごとの 処理時間・DB時間・SQL件数 のヒストグラム"""
+    SERIES = (
+        ("task_manager_request_duration_ms", "total_ms", DURATION_BUCKETS_MS),
+        ("task_manager_request_db_time_ms", "db_ms", DURATION_BUCKETS_MS),
+        ("task_manager_request_template_ms", "template_ms", DURATION_BUCKETS_MS),
+        ("task_manager_request_sql_statements", "sql_count", SQL_COUNT_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, method, status, sample):
+        key = (route, method, f"{status // 100}xx")
+        with self._lock:
+            histograms = self._routes.get(key)
+            if histograms is None:
+                histograms = self._routes[key] = {
+                    key: Histogram(buckets) for _, key, buckets in self.SERIES
+                }
+            for _, key, _ in self.SERIES:
+                histograms[key].observe(sample[key])
+
+    def render(self, extra_lines=()):
+        pid = os.getpid()
+        lines = []
+        with self._lock:
+            for name, key, _ in self.SERIES:
+                lines.append(f"# TYPE {name} histogram")
+                for (route, method, status), histograms in sorted(self._routes.items()):
+                    labels = f'route="{route}",method="{method}",status="{status}",pid="{pid}"'
+                    lines.extend(histograms[key].render(name, labels))
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+metrics = RouteMetrics()
+# /metrics に追加で出す値（コネクションプールの状態など）を返す関数のリスト
+extra_metric_providers = []
+
+
+def _current():
+    return g.get("_perf") if has_app_context() else None
+
+
+# --- SQLAlchemy（全エンジン共通。init_app で登録するので、計測しない場合は何も付かない） ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_perf_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_perf_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    perf = _current()
+    if perf is not None:
+        perf["sql_count"] += 1
+        perf["db_time"] += elapsed
+
+
+def _handle_error(exception_context):
+    # 失敗した文では after_cursor_execute が呼ばれないので、開始時刻をここで捨てる
+    # （残すと接続が使い回される間ずっと積み上がり、後の文の時間もずれる）
+    conn = getattr(exception_context, "connection", None)
+    if conn is not None and getattr(exception_context, "execution_context", None) is not None:
+        starts = conn.info.get("_perf_query_start")
+        if starts:
+            starts.pop()
+
+
+def _register_engine_listeners():
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+def init_app(app, slow_request_ms=None, metrics_token=None):
+    """計測フックと /metrics を app に登録する"""
+    if slow_request_ms is None:
+        slow_request_ms = float(os.environ.get("SLOW_REQUEST_MS", 1000))
+    if metrics_token is None:
+        metrics_token = os.environ.get("METRICS_TOKEN")
+    _register_engine_listeners()
+
+    @app.before_request
+    def _start_request_timer():
+        g._perf = {"start": time.perf_counter(), "sql_count": 0, "db_time": 0.0,
+                   "template_time": 0.0, "template_start": []}
+
+    def _before_render(sender, template, context, **extra):
+        perf = _current()
+        if perf is not None:
+            perf["template_start"].append(time.perf_counter())
+
+    def _after_render(sender, template, context, **extra):
+        perf = _current()
+        if perf is not None and perf["template_start"]:
+            perf["template_time"] += time.perf_counter() - perf["template_start"].pop()
+
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_after_render, app, weak=False)
+
+    def _observe(perf, route, method, path, status):
+        """計測値をヒストグラムに入れ、遅ければログに出す。(total_ms, db_ms, template_ms) を返す"""
+        total_ms = (time.perf_counter() - perf["start"]) * 1000
+        db_ms = perf["db_time"] * 1000
+        template_ms = perf["template_time"] * 1000
+        sample = {
+            "total_ms": total_ms,
+            "db_ms": db_ms,
+            "template_ms": template_ms,
+            "sql_count": perf["sql_count"],
+        }
+        metrics.observe(route, method, status, sample)
+
+        if total_ms >= slow_request_ms:
+            slow_logger.warning(json.dumps(dict(
+                sample,
+                method=method,
+                path=path,
+                route=route,
+                status=status,
+                total_ms=round(total_ms, 1),
+                db_ms=round(db_ms, 1),
+                template_ms=round(template_ms, 1),
+            ), ensure_ascii=False))
+        return total_ms, db_ms, template_ms
+
+    def _request_labels():
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        path = request.full_path if request.query_string else request.path
+        return route, request.method, path
+
+    @app.after_request
+    def _record_request(response):
+        perf = _current()
+        if perf is None:
+            return response
+        perf["recorded"] = True
+        route, method, path = _request_labels()
+
+        if response.is_streamed:
+            # 本体がイテレーター（CSV のストリーミング等）のときはまだ生成していないので、
+            # 送り終えた時点で記録する（Server-Timing は付けられない）。
+            # SSE は接続している時間そのものなので記録しない
+            if response.mimetype != "text/event-stream":
+                status = response.status_code
+                response.call_on_close(lambda: _observe(perf, route, method, path, status))
+            return response
+
+        total_ms, db_ms, template_ms = _observe(perf, route, method, path, response.status_code)
+        app_ms = max(total_ms - db_ms - template_ms, 0.0)
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_ms:.1f};desc="{perf["sql_count"]} queries", '
+            f"tpl;dur={template_ms:.1f}, app;dur={app_ms:.1f}, total;dur={total_ms:.1f}"
+        )
+        return response
+
+    @app.teardown_request
+    def _record_failed_request(exc):
+        # 例外が伝播した（debug / PROPAGATE_EXCEPTIONS）場合や、後続の after_request で例外になった場合は
+        # _record_request が呼ばれないので、ここで 500 として記録する
+        perf = _current()
+        if perf is None or exc is None or perf.get("recorded"):
+            return
+        perf["recorded"] = True
+        _observe(perf, *_request_labels(), 500)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        # METRICS_TOKEN があれば Bearer トークン、無ければ super_admin のログインを要求する
+        if metrics_token:
+            if request.headers.get("Authorization") != f"Bearer {metrics_token}":
+                abort(401)
+        else:
+            from flask_login import current_user
+            if not current_user.is_authenticated or getattr(current_user, "role", None) != "super_admin":
+                abort(403)
+        extra_lines = []
+        for provider in extra_metric_providers:
+            extra_lines.extend(provider())
+        return Response(metrics.render(extra_lines), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,185 @@
+import argparse
+import re
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy.exc import OperationalError
+
+from app import app, db, jst_today, rebuild_monthly_rollup, ArchivedMonth
+from config import SYSTEM_START_DATE
+
+# taskstatus の月パーティション（migrations/2026-10-18_partition_taskstatus.sql）の保守
+#   --ahead N             : 当月から N か月先までのパーティションを作成（cron で毎日/毎月実行する想定）
+#   --archive-after N     : N か月より前の月を月次ロールアップ（taskstatus_monthly）に集約したうえで切り離す
+#       --mode detach     : パーティションを切り離して taskstatus_archive_yYYYYmMM として残す（既定）
+#       --mode drop       : 切り離したパーティションを削除する
+# アーカイブ済みの月は月間・期間レポートにはロールアップで表示され、ダッシュボード・履歴CSVには表示されない。
+# アーカイブした月は taskstatus_archived_month に記録され、以降の書き込み・ロールアップの作り直しの対象外になる。
+# システム開始月は途中から集計する（月間レポートが taskstatus を直接読む）ため、アーカイブしない。
+
+PARENT = "taskstatus"
+DEFAULT_PARTITION = "taskstatus_default"
+PARTITION_NAME = re.compile(r"^taskstatus_y(\d{4})m(\d{2})$")
+# アーカイブ時のロック待ちの上限と再試行（ロック待ちの間は後続の読み書きもすべて待たされるため短くする）
+ARCHIVE_LOCK_TIMEOUT = "5s"
+ARCHIVE_LOCK_RETRIES = 5
+ARCHIVE_LOCK_RETRY_WAIT = 10  # 秒
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def add_months(year, month, n):
+    index = year * 12 + (month - 1) + n
+    return index // 12, index % 12 + 1
+
+
+def partition_name(year, month, prefix=PARENT):
+    return f"{prefix}_y{year:04d}m{month:02d}"
+
+
+def month_bounds(year, month):
+    next_year, next_month = add_months(year, month, 1)
+    return date(year, month, 1), date(next_year, next_month, 1)
+
+
+def list_partitions():
+    """{(year, month): パーティション名}（既定パーティションは含まない）"""
+    rows = db.session.execute(db.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT})
+    partitions = {}
+    for (name,) in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[(int(match.group(1)), int(match.group(2)))] = name
+    return partitions
+
+
+def count_default_rows():
+    return db.session.execute(db.text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}")).scalar()
+
+
+def ensure_partition(year, month):
+    """
+    月のパーティションを作る。既定パーティションにその月の行が入っていれば移してから付け替える
+    （既定パーティションに該当行がある状態では PARTITION OF で作成できないため）。
+    """
+    name = partition_name(year, month)
+    first_day, next_first_day = month_bounds(year, month)
+    params = {"first_day": first_day, "next_first_day": next_first_day}
+    db.session.execute(db.text(
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    # 付け替え時の範囲チェックの全件走査を省くための制約
+    db.session.execute(db.text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_date_range "
+        f"CHECK (date IS NOT NULL AND date >= DATE '{first_day}' AND date < DATE '{next_first_day}')"
+    ))
+    moved = db.session.execute(db.text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE date >= :first_day AND date < :next_first_day RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), params).rowcount
+    db.session.execute(db.text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{first_day}') TO ('{next_first_day}')"
+    ))
+    db.session.execute(db.text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_date_range"))
+    return moved
+
+
+def lock_for_archive():
+    """
+    taskstatus を ACCESS EXCLUSIVE でロックする（トランザクションの最初に呼ぶ）。
+    DETACH に必要なロックを最初に取っておかないと、SHARE ロックから格上げする間に
+    書き込み側とデッドロックする。取れなければ lock_timeout で諦め、間を置いて取り直す。
+    """
+    for attempt in range(1, ARCHIVE_LOCK_RETRIES + 1):
+        try:
+            db.session.execute(db.text(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'"))
+            db.session.execute(db.text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+            return
+        except OperationalError as e:
+            if getattr(e.orig, "pgcode", None) != LOCK_NOT_AVAILABLE or attempt == ARCHIVE_LOCK_RETRIES:
+                raise
+            db.session.rollback()
+            print(f"⏳ Could not lock {PARENT} (attempt {attempt}/{ARCHIVE_LOCK_RETRIES}), retrying in {ARCHIVE_LOCK_RETRY_WAIT}s")
+            time.sleep(ARCHIVE_LOCK_RETRY_WAIT)
+
+
+def archive_partition(year, month, drop):
+    """
+    月のステータスを月次ロールアップに集約し直してから、パーティションを切り離す。
+    drop=False なら taskstatus_archive_yYYYYmMM に名前を変えて残す。
+    """
+    if (year, month) <= (SYSTEM_START_DATE.year, SYSTEM_START_DATE.month):
+        raise ValueError(f"{year}年{month}月はシステム開始月以前のためアーカイブできません")
+    name = partition_name(year, month)
+    # 作り直し〜記録〜切り離しは、最初に取った ACCESS EXCLUSIVE ロックで読み書きを止めたまま行う
+    # （rebuild_monthly_rollup の SHARE ロックはこのロックに含まれるので待たない）
+    lock_for_archive()
+    rebuild_monthly_rollup(year, month)
+    db.session.add(ArchivedMonth(year=year, month=month, archived_at=datetime.now(timezone.utc)))
+    db.session.flush()
+    db.session.execute(db.text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    if drop:
+        db.session.execute(db.text(f"DROP TABLE {name}"))
+    else:
+        db.session.execute(db.text(f"ALTER TABLE {name} RENAME TO {partition_name(year, month, 'taskstatus_archive')}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="taskstatus の月パーティションの作成・アーカイブ")
+    parser.add_argument("--ahead", type=int, default=3, help="当月から何か月先までパーティションを作るか")
+    parser.add_argument("--archive-after", type=int, help="この月数より前の月をアーカイブする（省略時はアーカイブしない）")
+    parser.add_argument("--mode", choices=("detach", "drop"), default="detach", help="アーカイブした月の扱い")
+    parser.add_argument("--dry-run", action="store_true", help="実行内容の表示のみ")
+    args = parser.parse_args()
+
+    if db.engine.dialect.name != "postgresql":
+        parser.error("PostgreSQL（パーティション化済みの taskstatus）でのみ実行できます")
+    if args.archive_after is not None and args.archive_after < 2:
+        parser.error("--archive-after は 2 以上を指定してください（当月・前月はアーカイブしない）")
+
+    today = jst_today()
+    partitions = list_partitions()
+
+    # --- 先の月のパーティション作成 ---
+    for n in range(args.ahead + 1):
+        year, month = add_months(today.year, today.month, n)
+        if (year, month) in partitions:
+            continue
+        if args.dry_run:
+            print(f"create {partition_name(year, month)}")
+            continue
+        moved = ensure_partition(year, month)
+        db.session.commit()
+        print(f"✅ Created {partition_name(year, month)} (moved {moved} rows from {DEFAULT_PARTITION})")
+
+    # --- 古い月のアーカイブ ---
+    if args.archive_after is not None:
+        horizon = add_months(today.year, today.month, -args.archive_after)
+        start_month = (SYSTEM_START_DATE.year, SYSTEM_START_DATE.month)
+        for year, month in sorted(ym for ym in partitions if ym < horizon):
+            if (year, month) <= start_month:
+                print(f"skip {partition_name(year, month)} (system start month)")
+                continue
+            if args.dry_run:
+                print(f"archive {partition_name(year, month)} ({args.mode})")
+                continue
+            archive_partition(year, month, drop=args.mode == "drop")
+            db.session.commit()
+            print(f"📦 Archived {partition_name(year, month)} ({args.mode})")
+
+    leftover = count_default_rows()
+    if leftover:
+        # アーカイブ済みの月や作成範囲外の日付への書き込み
+        print(f"⚠️ {DEFAULT_PARTITION} has {leftover} rows outside the monthly partitions")
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        main()
@@ -0,0 +1,18 @@
+-- 管理者（admin）の変更を全ワーカーに通知するトリガー（PostgreSQL）
+-- 各ワーカーはログイン中の管理者の情報（権限など）をキャッシュしているため、
+-- 権限の変更・削除はコミット時の NOTIFY（admin_changes、ペイロードは account_id）で即座に破棄させる。
+-- 受信には LISTEN できる接続先（DATABASE_LISTEN_URL）が必要。無い場合は ADMIN_CACHE_TTL 秒以内に反映される。
+CREATE OR REPLACE FUNCTION notify_admin_changed() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('admin_changes', OLD.account_id);
+  IF TG_OP = 'UPDATE' AND NEW.account_id IS DISTINCT FROM OLD.account_id THEN
+    PERFORM pg_notify('admin_changes', NEW.account_id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_admin_notify_changed ON admin;
+CREATE TRIGGER trg_admin_notify_changed
+  AFTER UPDATE OR DELETE ON admin
+  FOR EACH ROW EXECUTE FUNCTION notify_admin_changed();
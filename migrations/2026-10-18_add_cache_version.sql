@@ -0,0 +1,36 @@
+-- 月間レポートキャッシュ無効化用のバージョンカウンタ（PostgreSQL）
+-- scope = 'global'         : ユーザー・タスク・管理者の変更
+-- scope = 'month:YYYY-MM'  : その月のステータス変更（アプリの書き込み処理が更新）
+CREATE TABLE IF NOT EXISTS cache_version (
+    scope VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- ユーザー・タスク・管理者をSQLやダッシュボード（Supabase）から直接変更した場合も
+-- 全ワーカーのキャッシュが無効になるよう、文単位トリガーで global を更新する
+CREATE OR REPLACE FUNCTION bump_global_cache_version() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO cache_version (scope, version, updated_at)
+  VALUES ('global', 1, now())
+  ON CONFLICT (scope) DO UPDATE
+    SET version = cache_version.version + 1,
+        updated_at = EXCLUDED.updated_at;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_user_bump_cache_version ON "user";
+CREATE TRIGGER trg_user_bump_cache_version
+  AFTER INSERT OR UPDATE OR DELETE ON "user"
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_global_cache_version();
+
+DROP TRIGGER IF EXISTS trg_task_bump_cache_version ON task;
+CREATE TRIGGER trg_task_bump_cache_version
+  AFTER INSERT OR UPDATE OR DELETE ON task
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_global_cache_version();
+
+DROP TRIGGER IF EXISTS trg_admin_bump_cache_version ON admin;
+CREATE TRIGGER trg_admin_bump_cache_version
+  AFTER INSERT OR UPDATE OR DELETE ON admin
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_global_cache_version();
@@ -0,0 +1,27 @@
+-- task(user_id, name) に一意制約を追加（PostgreSQL）
+-- generate_tasks.py を同時に実行しても同じタスクが二重に作られないようにする。
+
+-- 事前確認：重複があると制約を追加できない。結果が返る場合は先に整理すること
+-- （taskstatus が参照しているため、どちらを残すかは個別に判断する）
+SELECT user_id, name, array_agg(taskkey ORDER BY taskkey) AS taskkeys
+FROM task
+GROUP BY user_id, name
+HAVING COUNT(*) > 1;
+
+-- 書き込みを止めないよう、一意インデックスを CONCURRENTLY で作ってから制約に昇格する
+-- （CONCURRENTLY はトランザクション外で実行すること）
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_task_user_id_name
+  ON task(user_id, name);
+
+-- 再実行しても失敗しないよう、制約が未作成の場合だけ昇格する
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conname = 'uq_task_user_id_name' AND conrelid = 'task'::regclass
+  ) THEN
+    ALTER TABLE task
+      ADD CONSTRAINT uq_task_user_id_name UNIQUE USING INDEX uq_task_user_id_name;
+  END IF;
+END;
+$$;
@@ -0,0 +1,17 @@
+-- パーティションを切り離した（アーカイブ済みの）月の記録（PostgreSQL）
+-- maintain_partitions.py --archive-after が切り離しと同じトランザクションで追加する。
+-- アプリはこの月への書き込みを却下し、rebuild_monthly_rollup.py（全期間）もこの月の集計を残したままにする。
+CREATE TABLE IF NOT EXISTS taskstatus_archived_month (
+    year INTEGER,
+    month INTEGER,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (year, month)
+);
+
+-- この記録より前に切り離した月（taskstatus_archive_yYYYYmMM として残している場合）を登録する
+INSERT INTO taskstatus_archived_month (year, month)
+SELECT substring(relname FROM 'y(\d{4})m')::int,
+       substring(relname FROM 'm(\d{2})$')::int
+FROM pg_class
+WHERE relkind = 'r' AND relname ~ '^taskstatus_archive_y\d{4}m\d{2}$'
+ON CONFLICT (year, month) DO NOTHING;
@@ -0,0 +1,29 @@
+-- タスク×月ごとの 済/休/無 件数を持つ月次ロールアップテーブル（PostgreSQL）
+-- 書き込み時にアプリが差分を加算して維持する。
+-- 作り直す場合は `python rebuild_monthly_rollup.py`（全期間）または
+-- `python rebuild_monthly_rollup.py --year 2026 --month 3`（1か月分）を実行する。
+CREATE TABLE IF NOT EXISTS taskstatus_monthly (
+    task_id INTEGER REFERENCES task(taskkey),
+    year INTEGER,
+    month INTEGER,
+    completed INTEGER NOT NULL DEFAULT 0,
+    rest INTEGER NOT NULL DEFAULT 0,
+    none_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, year, month)
+);
+
+-- 既存データからの初期作成
+INSERT INTO taskstatus_monthly (task_id, year, month, completed, rest, none_count)
+SELECT task_id,
+       EXTRACT(YEAR FROM date)::int,
+       EXTRACT(MONTH FROM date)::int,
+       COUNT(*) FILTER (WHERE status = 1),
+       COUNT(*) FILTER (WHERE status = 2),
+       COUNT(*) FILTER (WHERE status = 3)
+FROM taskstatus
+WHERE status IN (1, 2, 3)
+GROUP BY 1, 2, 3
+ON CONFLICT (task_id, year, month) DO UPDATE
+  SET completed = EXCLUDED.completed,
+      rest = EXCLUDED.rest,
+      none_count = EXCLUDED.none_count;
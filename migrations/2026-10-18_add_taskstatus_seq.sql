@@ -0,0 +1,12 @@
+-- taskstatus に変更番号（seq）を追加（PostgreSQL）
+-- ダッシュボードの差分同期（/api/dashboard/changes）が「カーソル以降に変更されたセル」だけを返すために使う。
+-- アプリは書き込みトランザクションごとに taskstatus_seq から1つ払い出して、書き込んだ全行に設定する。
+-- 既存行は NULL のまま（差分同期の対象外＝初回表示で取得済みとみなす）
+CREATE SEQUENCE IF NOT EXISTS taskstatus_seq;
+
+ALTER TABLE taskstatus
+  ADD COLUMN IF NOT EXISTS seq BIGINT;
+
+-- CONCURRENTLY はトランザクション外で実行すること
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_taskstatus_seq
+  ON taskstatus(seq);
@@ -0,0 +1,6 @@
+-- taskstatus に (task_id, date) の複合インデックスを追加（PostgreSQL）
+-- ダッシュボード／月間レポートは「表示中タスク × 表示期間」だけを読むため、
+-- 主キー (user_id, task_id, date) ではなくこの順序のインデックスを使う。
+-- CONCURRENTLY はトランザクション外で実行すること（書き込みをブロックしない）
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_taskstatus_task_id_date
+  ON taskstatus(task_id, date);
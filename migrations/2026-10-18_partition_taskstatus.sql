@@ -0,0 +1,61 @@
+-- taskstatus を date の月単位レンジパーティションに変換（PostgreSQL 12 以降）
+-- ・親テーブル名・列・主キー (user_id, task_id, date) は変わらないので、アプリ（ORM）の変更は不要
+-- ・表示期間（date の範囲）で絞るダッシュボード・レポートのクエリはパーティションプルーニングで該当月だけを読む
+-- ・パーティション名は taskstatus_yYYYYmMM。範囲外の日付は taskstatus_default に入る
+-- ・以降の月のパーティション作成と古い月のアーカイブは maintain_partitions.py で行う
+--     python maintain_partitions.py --ahead 3
+--     python maintain_partitions.py --archive-after 24 --mode detach
+--
+-- 全行をコピーするため、書き込みの少ない時間帯に1トランザクションで実行すること
+-- （完了まで taskstatus への書き込みは待たされる）
+BEGIN;
+
+LOCK TABLE taskstatus IN EXCLUSIVE MODE;
+
+ALTER TABLE taskstatus RENAME TO taskstatus_unpartitioned;
+ALTER INDEX taskstatus_pkey RENAME TO taskstatus_unpartitioned_pkey;
+ALTER INDEX idx_taskstatus_task_id_date RENAME TO idx_taskstatus_unpartitioned_task_id_date;
+ALTER INDEX idx_taskstatus_seq RENAME TO idx_taskstatus_unpartitioned_seq;
+
+CREATE TABLE taskstatus (
+    user_id INTEGER REFERENCES "user"(userid),
+    task_id INTEGER REFERENCES task(taskkey),
+    date DATE,
+    status INTEGER DEFAULT 0,
+    seq BIGINT,
+    PRIMARY KEY (user_id, task_id, date)
+) PARTITION BY RANGE (date);
+
+CREATE INDEX idx_taskstatus_task_id_date ON taskstatus(task_id, date);
+CREATE INDEX idx_taskstatus_seq ON taskstatus(seq);
+
+CREATE TABLE taskstatus_default PARTITION OF taskstatus DEFAULT;
+
+-- 既存データの最初の月から 3か月先まで
+DO $$
+DECLARE
+  month_start DATE;
+  last_month DATE := date_trunc('month', now() + interval '3 months')::date;
+BEGIN
+  SELECT date_trunc('month', COALESCE(MIN(date), now()))::date INTO month_start
+  FROM taskstatus_unpartitioned;
+  WHILE month_start <= last_month LOOP
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF taskstatus FOR VALUES FROM (%L) TO (%L)',
+      'taskstatus_' || to_char(month_start, '"y"YYYY"m"MM'),
+      month_start,
+      (month_start + interval '1 month')::date
+    );
+    month_start := (month_start + interval '1 month')::date;
+  END LOOP;
+END $$;
+
+INSERT INTO taskstatus (user_id, task_id, date, status, seq)
+SELECT user_id, task_id, date, status, seq FROM taskstatus_unpartitioned;
+
+ANALYZE taskstatus;
+
+-- 旧テーブルは確認後に削除する
+--   DROP TABLE taskstatus_unpartitioned;
+
+COMMIT;
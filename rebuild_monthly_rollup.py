@@ -0,0 +1,23 @@
+import argparse
+
+from app import app, db, rebuild_monthly_rollup
+
+def main():
+    parser = argparse.ArgumentParser(description="taskstatus から月次ロールアップ（taskstatus_monthly）を作り直す")
+    parser.add_argument("--year", type=int, help="対象年（--month と併用。省略時は全期間）")
+    parser.add_argument("--month", type=int, help="対象月（--year と併用。省略時は全期間）")
+    args = parser.parse_args()
+    if (args.year is None) != (args.month is None):
+        parser.error("--year と --month は両方指定してください")
+
+    try:
+        count = rebuild_monthly_rollup(args.year, args.month)
+    except ValueError as e:
+        parser.error(str(e))
+    db.session.commit()
+    target = f"{args.year}年{args.month}月" if args.year is not None else "全期間（アーカイブ済みの月を除く）"
+    print(f"✅ Monthly rollup rebuilt ({target}): {count} rows")
+
+if __name__ == "__main__":
+    with app.app_context():
+        main()
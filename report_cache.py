@@ -0,0 +1,50 @@
+# report_cache.py
+"""
+レンダリング済みレポートをワーカー内に保持する LRU キャッシュ。
+件数と合計バイト数の両方で上限を設け、超えた分は古いものから捨てる。
+整合性（いつ無効になるか）は呼び出し側が渡す etag で判定する。
+"""
+from collections import OrderedDict
+import threading
+
+
+class ReportCache:
+    def __init__(self, max_entries=128, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (etag, body)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, etag):
+        """etag が一致するエントリの本文を返す。無い・古い場合は None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != etag:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, etag, body):
+        with self._lock:
+            self._discard(key)
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (etag, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
@@ -0,0 +1,602 @@
+// テンプレートから渡される設定（URL・表示中の日付）
+const CONFIG = JSON.parse(document.getElementById('dashboard-config').textContent);
+
+const STATUS_LABELS = ['未','済','休','無'];
+const SYNC_INTERVAL_MS = 15000;       // リアルタイム通知が使えない間の定期同期の間隔
+const LIVE_SYNC_INTERVAL_MS = 60000;  // 通知の取りこぼしに備えた、接続中の定期同期の間隔
+
+// 差分同期の状態（カーソル＝取り込み済みの変更番号、セル位置→ボタンの索引）
+let syncCursor = null;
+let gridDays = { from: null, to: null };
+const cellButtons = new Map();
+let liveConnected = false;
+
+// --- ステータス表の描画（タスクごとの数字列から各日のボタンを生成） ---
+async function loadStatusGrid() {
+    const res = await fetch(CONFIG.gridUrl, {
+        headers: { "Accept": "application/json" }
+    });
+    const grid = await res.json();
+    if (!grid.success) throw new Error(grid.error || "grid");
+    const archived = new Set(grid.archived_months || []);
+
+    document.querySelectorAll('tr.task-row').forEach(tr => {
+        const packed = grid.statuses[tr.dataset.task] || '';
+        const frag = document.createDocumentFragment();
+        grid.days.forEach((day, i) => {
+            const status = Number(packed.charAt(i) || 0);
+            const td = document.createElement('td');
+            if (day === grid.today) td.className = 'today-col';
+            const btn = document.createElement('button');
+            btn.type = 'button';
+            btn.className = `status-btn status-${status}`;
+            btn.dataset.task = tr.dataset.task;
+            btn.dataset.taskname = tr.dataset.taskname;
+            btn.dataset.day = day;
+            // 未来日・システム開始前・アーカイブ済みの月は編集不可（ISO形式なので文字列比較でよい）
+            if (day > grid.today || day < grid.system_start_date || archived.has(day.slice(0, 7))) btn.disabled = true;
+            btn.textContent = STATUS_LABELS[status];
+            td.appendChild(btn);
+            frag.appendChild(td);
+            cellButtons.set(`${tr.dataset.task}_${day}`, btn);
+        });
+        tr.appendChild(frag);
+    });
+    syncCursor = grid.cursor;
+    gridDays = { from: grid.days[0], to: grid.days[grid.days.length - 1] };
+    return grid;
+}
+
+// --- リアルタイム通知（SSE）：他の管理者の変更があれば差分同期する ---
+function connectLiveUpdates() {
+    if (!window.EventSource || !CONFIG.streamUrl) return;
+    const source = new EventSource(CONFIG.streamUrl);
+    source.onopen = () => {
+        // 切断中の変更を取りこぼさないよう、（再）接続のたびに同期する
+        liveConnected = true;
+        syncChanges();
+    };
+    source.onerror = () => { liveConnected = false; };  // 自動で再接続される
+    source.addEventListener('status', (e) => {
+        const ev = JSON.parse(e.data);
+        // 表示中の期間と重ならない変更は無視する
+        if (ev.from && ev.to && (ev.to < gridDays.from || ev.from > gridDays.to)) return;
+        if (ev.seq !== null && syncCursor !== null && ev.seq <= syncCursor) return;
+        syncChanges();
+    });
+}
+
+// --- ボタン1つの表示をステータスに合わせる ---
+function renderStatus(btn, status) {
+    btn.classList.remove('status-0','status-1','status-2','status-3');
+    btn.classList.add('status-' + status);
+    btn.textContent = STATUS_LABELS[status];
+}
+
+// --- 差分同期：カーソル以降に変更されたセルだけを取得して書き換える ---
+// 呼び出しは順番に実行する（同期中に呼ばれた場合は、終わってからもう一度取得する）
+let syncChain = Promise.resolve();
+function syncChanges() {
+    syncChain = syncChain.then(fetchChanges);
+    return syncChain;
+}
+
+async function fetchChanges() {
+    if (syncCursor === null) return;
+    try {
+        const url = new URL(CONFIG.changesUrl, window.location.href);
+        url.searchParams.set('since', syncCursor);
+        const res = await fetch(url, { headers: { "Accept": "application/json" } });
+        const result = await res.json();
+        if (!result.success) return;
+        if (result.reload) {
+            window.location.reload();
+            return;
+        }
+        result.changes.forEach(([taskkey, day, status]) => {
+            const key = `${taskkey}_${day}`;
+            const btn = cellButtons.get(key);
+            if (btn && !hasLocalWrite(key)) renderStatus(btn, status);
+        });
+        syncCursor = result.cursor;
+    } catch (err) {
+        // 通信エラー時は次の周期で再試行する
+    }
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+
+    try {
+        await loadStatusGrid();
+    } catch (err) {
+        alert("ステータスの取得に失敗しました: " + err);
+    }
+
+    // 💡 他の管理者の変更はリアルタイム通知で取り込み、通知が切れている間は定期的に差分同期する
+    // （接続中も通知が届かない場合に備えて、間隔を空けて同期は続ける）
+    connectLiveUpdates();
+    setInterval(() => { if (!document.hidden && !liveConnected) syncChanges(); }, SYNC_INTERVAL_MS);
+    setInterval(() => { if (!document.hidden && liveConnected) syncChanges(); }, LIVE_SYNC_INTERVAL_MS);
+    document.addEventListener('visibilitychange', () => { if (!document.hidden) syncChanges(); });
+
+    const tableContainer = document.querySelector('.table-container');
+
+    // --- 一括登録モーダルの制御（ユーザー・グループ・全体共通 ＆ タスク完全重複排除版） ---
+    const bulkModal = document.getElementById('bulkModal');
+    const modalTitle = document.querySelector('.modal-title');
+    const modalTaskContainer = document.getElementById('modalTaskContainer');
+    const selectAllTasks = document.getElementById('selectAllTasks');
+    
+    // 一括処理の実行に必要な情報を格納
+    let currentBulkTarget = {
+        type: null,       // 'user', 'group', 'global'
+        groupName: null,  // グループ名
+        userIds: [],      // 対象ユーザーID
+        days: []          // 対象日付
+    };
+
+    const currentDays = CONFIG.days;
+
+    // 💡 モーダル内にタスクのチェックボックスを生成する共通関数（タスク名で管理）
+    function populateModalTasks(taskNamesSet) {
+        modalTaskContainer.innerHTML = '';
+        if (taskNamesSet.size === 0) {
+            modalTaskContainer.innerHTML = '<div style="color:#e74c3c; font-size:0.85rem; padding: 5px;">対象のタスクが取得できませんでした。</div>';
+        } else {
+            // タスク名をそのままチェックボックスの値（value）にして生成
+            taskNamesSet.forEach(taskName => {
+                const div = document.createElement('div');
+                div.style.margin = '6px 0';
+                div.style.display = 'flex';
+                div.style.alignItems = 'center';
+                div.innerHTML = `
+                    <label style="cursor:pointer; font-size:0.9rem; display:flex; align-items:center; gap:8px; width:100%; user-select:none; text-align:left;">
+                        <input type="checkbox" class="modal-task-item" value="${taskName}" checked style="margin:0; width:16px; height:16px;"> 
+                        <span>${taskName}</span>
+                    </label>
+                `;
+                modalTaskContainer.appendChild(div);
+            });
+        }
+        if (selectAllTasks) selectAllTasks.checked = true;
+    }
+
+    // ① 個人の名前クリック時
+    document.querySelectorAll('.user-name-clickable').forEach(td => {
+        td.addEventListener('click', (e) => {
+            e.preventDefault();
+            const userId = td.dataset.userid;
+            const userName = td.dataset.username;
+
+            if (modalTitle) modalTitle.innerHTML = `<span id="targetUserName">${userName}</span> さんのタスク一括変更`;
+            currentBulkTarget = { type: 'user', groupName: null, userIds: [userId], days: currentDays };
+
+            // そのユーザーの行からタスク名を重複なく抽出
+            const taskNamesSet = new Set();
+            const userRow = td.closest('tr');
+            let nextRow = userRow ? userRow.nextElementSibling : null;
+            while (nextRow) {
+                if (nextRow.classList.contains('user-row') || nextRow.classList.contains('group-row')) break;
+                if (nextRow.classList.contains('task-row')) {
+                    const btn = nextRow.querySelector('.status-btn');
+                    if (btn && btn.dataset.taskname) taskNamesSet.add(btn.dataset.taskname);
+                }
+                nextRow = nextRow.nextElementSibling;
+            }
+
+            populateModalTasks(taskNamesSet);
+            if (bulkModal) bulkModal.style.display = 'flex';
+        });
+    });
+
+    // ② グループ（部署）の日付マス（グレー）クリック時
+    document.querySelectorAll('.group-day-clickable').forEach(td => {
+        td.addEventListener('click', (e) => {
+            e.preventDefault();
+            const groupName = td.dataset.group;
+            const targetDay = td.dataset.day;
+            const displayDay = targetDay.substring(5).replace('-', '/');
+
+            if (modalTitle) modalTitle.innerHTML = `<span>${groupName} (${displayDay})</span> のタスク一括変更`;
+
+            const userIds = [];
+            document.querySelectorAll(`tr.user-row[data-group="${groupName}"] .user-name-clickable`).forEach(u => {
+                userIds.push(u.dataset.userid);
+            });
+
+            currentBulkTarget = { type: 'group', groupName: groupName, userIds: userIds, days: [targetDay] };
+
+            // そのグループの行からタスク名を重複なく抽出
+            const taskNamesSet = new Set();
+            document.querySelectorAll(`tr.task-row[data-group="${groupName}"]`).forEach(tr => {
+                const btn = tr.querySelector('.status-btn');
+                if (btn && btn.dataset.taskname) taskNamesSet.add(btn.dataset.taskname);
+            });
+
+            populateModalTasks(taskNamesSet);
+            if (bulkModal) bulkModal.style.display = 'flex';
+        });
+    });
+
+    // ③ 最上部の日付ヘッダー（th）クリック時
+    document.querySelectorAll('.global-day-clickable').forEach(th => {
+        th.addEventListener('click', (e) => {
+            e.preventDefault();
+            const targetDay = th.dataset.day;
+            const displayDay = targetDay.substring(5).replace('-', '/');
+
+            if (modalTitle) modalTitle.innerHTML = `<span>全体 (${displayDay})</span> のタスク一括変更`;
+
+            const userIds = [];
+            document.querySelectorAll('.user-name-clickable').forEach(u => {
+                userIds.push(u.dataset.userid);
+            });
+
+            currentBulkTarget = { type: 'global', groupName: null, userIds: userIds, days: [targetDay] };
+
+            // 画面上のすべてのタスク名を重複なく抽出
+            const taskNamesSet = new Set();
+            document.querySelectorAll('tr.task-row').forEach(tr => {
+                const btn = tr.querySelector('.status-btn');
+                if (btn && btn.dataset.taskname) taskNamesSet.add(btn.dataset.taskname);
+            });
+
+            populateModalTasks(taskNamesSet);
+            if (bulkModal) bulkModal.style.display = 'flex';
+        });
+    });
+
+    // 全選択・全解除のトグル連動
+    if (selectAllTasks) {
+        selectAllTasks.addEventListener('change', function() {
+            document.querySelectorAll('.modal-task-item').forEach(cb => {
+                cb.checked = selectAllTasks.checked;
+            });
+        });
+    }
+
+    // キャンセル操作
+    const closeModalBtn = document.getElementById('closeModalBtn');
+    if (closeModalBtn) {
+        closeModalBtn.addEventListener('click', () => { bulkModal.style.display = 'none'; });
+    }
+    window.addEventListener('click', (e) => {
+        if (e.target === bulkModal) bulkModal.style.display = 'none';
+    });
+
+    // 💡 モーダル内のステータスボタンが押された時の共通一括保存処理
+    window.submitBulkStatus = async function(statusValue) {
+        if (currentBulkTarget.userIds.length === 0) return;
+
+        // チェックされた「タスク名」のリストを取得
+        const selectedTaskNames = [];
+        document.querySelectorAll('.modal-task-item:checked').forEach(cb => {
+            selectedTaskNames.push(cb.value);
+        });
+
+        if (selectedTaskNames.length === 0) {
+            alert('対象のタスクを少なくとも1つ選択してください。');
+            return;
+        }
+        
+        if (!confirm(`選択されたタスクを一括変更します。よろしいですか？`)) {
+            return;
+        }
+
+        try {
+            // 💡 画面上の実際のボタン要素を探索して、ユーザーごとの正しいタスクキー（ID）を集める
+            const entries = [];
+            for (const uId of currentBulkTarget.userIds) {
+                
+                // 対象ユーザーの全タスクボタンを取得
+                let selector = `.status-btn[data-task]`;
+                // グループ指定がある場合は絞り込み
+                if (currentBulkTarget.type === 'group' && currentBulkTarget.groupName) {
+                    selector = `tr[data-group="${currentBulkTarget.groupName}"] ${selector}`;
+                }
+
+                // 対象ユーザーかつ、選択されたタスク名に一致する「本物のタスクID」を特定する
+                const targetTaskIds = new Set();
+                document.querySelectorAll(selector).forEach(btn => {
+                    const row = btn.closest('tr');
+                    // 直近の user-row を上方向に辿って、自分自身のユーザーIDかどうか確認
+                    let prevTr = row ? row.previousElementSibling : null;
+                    let foundUserId = null;
+                    while (prevTr) {
+                        if (prevTr.classList.contains('user-row')) {
+                            const nameTd = prevTr.querySelector('.user-name-clickable');
+                            if (nameTd) foundUserId = nameTd.dataset.userid;
+                            break;
+                        }
+                        if (prevTr.classList.contains('group-row')) break;
+                        prevTr = prevTr.previousElementSibling;
+                    }
+
+                    if (foundUserId === uId && selectedTaskNames.includes(btn.dataset.taskname)) {
+                        targetTaskIds.add(parseInt(btn.dataset.task));
+                    }
+                });
+
+                if (targetTaskIds.size > 0) {
+                    entries.push({ user_id: uId, task_ids: Array.from(targetTaskIds) });
+                }
+            }
+
+            if (entries.length > 0) {
+                // 先に送信待ちの単体変更を保存し、一括変更が後から適用されるようにする
+                await drainWrites();
+                // バックエンドへ全ユーザー分を1回で一括更新リクエスト
+                const res = await fetch(CONFIG.bulkUpdateUrl, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                        days: currentBulkTarget.days,
+                        users: entries,
+                        status: statusValue
+                    })
+                });
+                const result = await res.json();
+                if (!result.success) {
+                    alert("保存エラー:" + (result.error || ""));
+                    return;
+                }
+                // 一部却下（未来日・開始日前・対象外タスク）があればユーザー別に報告
+                const reasons = { future: '未来日', before_system_start: '開始日前', archived: 'アーカイブ済み', invalid_date: '日付不正' };
+                const messages = [];
+                Object.entries(result.results).forEach(([uId, summary]) => {
+                    const td = document.querySelector(`.user-name-clickable[data-userid="${uId}"]`);
+                    const name = td ? td.dataset.username : uId;
+                    const skippedDays = summary.rejected_days.map(d => `${d.day}(${reasons[d.reason] || d.reason})`);
+                    if (skippedDays.length > 0 || summary.rejected_tasks.length > 0) {
+                        let msg = `${name}: ${summary.updated}件更新`;
+                        if (skippedDays.length > 0) msg += ` / 対象外日付 ${skippedDays.join(', ')}`;
+                        if (summary.rejected_tasks.length > 0) msg += ` / 対象外タスク ${summary.rejected_tasks.length}件`;
+                        messages.push(msg);
+                    }
+                });
+                if (messages.length > 0) {
+                    alert("一部のデータは更新されませんでした。\n" + messages.join("\n"));
+                }
+            }
+            // 💡 ページを再読み込みせず、変更されたセルだけを差分で反映する（スクロール位置もそのまま）
+            await syncChanges();
+        } catch (err) {
+            alert("通信エラーが発生しました: " + err);
+        } finally {
+            if (bulkModal) bulkModal.style.display = 'none';
+        }
+    };
+
+
+    // --- 4. 通常のステータスボタン（単体変更用ポップアップ）の処理 ---
+    // ボタンは描画後に生成されるため、表全体でイベントを受けて委譲する
+    if (tableContainer) {
+        tableContainer.addEventListener('click', (e) => {
+            const btn = e.target.closest('.status-btn');
+            if (!btn || btn.disabled) return;
+            e.stopPropagation();
+            
+            document.querySelectorAll('.status-menu').forEach(m => m.remove());
+            
+            const menu = document.createElement('div');
+            menu.className = 'status-menu';
+            menu.style.position = 'absolute';
+            menu.style.background = '#fff';
+            menu.style.border = '1px solid #ccc';
+            menu.style.borderRadius = '6px';
+            menu.style.boxShadow = '0 2px 6px rgba(0,0,0,0.2)';
+            menu.style.zIndex = 1000;
+
+            const options = [
+                {label:'未', value:0, color:'#e74c3c'},
+                {label:'済', value:1, color:'#2980b9'},
+                {label:'休', value:2, color:'#f1c40f', textColor:'#000'},
+                {label:'無', value:3, color:'#7f8c8d'}
+            ];
+
+            options.forEach(opt => {
+                const item = document.createElement('div');
+                item.textContent = opt.label;
+                item.style.padding = '4px 8px';
+                item.style.cursor = 'pointer';
+                item.style.color = opt.textColor || '#fff';
+                item.style.background = opt.color;
+                item.style.borderRadius = '4px';
+                item.style.margin = '3px';
+                item.style.textAlign = 'center';
+                item.addEventListener('click', () => {
+                    queueStatusWrite(btn, opt.value);
+                    menu.remove();
+                });
+                menu.appendChild(item);
+            });
+
+            document.body.appendChild(menu);
+            const rect = btn.getBoundingClientRect();
+            menu.style.left = `${rect.left + window.scrollX}px`;
+            menu.style.top = `${rect.bottom + window.scrollY + 4}px`;
+        });
+    }
+
+    document.addEventListener('click', () => {
+        document.querySelectorAll('.status-menu').forEach(m => m.remove());
+    });
+
+
+    // --- 5. グループ絞り込み機能 ---
+    const groupFilter = document.getElementById('groupFilter');
+    if (groupFilter) {
+        groupFilter.addEventListener('change', function() {
+            const selected = this.value;
+            document.querySelectorAll('tbody tr').forEach(tr => {
+                const group = tr.getAttribute('data-group');
+                if (!group) return;
+                if (selected === 'all' || group === selected) {
+                    tr.style.display = '';
+                } else {
+                    tr.style.display = 'none';
+                }
+            });
+        });
+    }
+});
+
+// --- 書き込みバッファ：単体変更をセルごとにまとめ、一定時間ごとに1リクエストで保存する ---
+// 同じセルを続けて変更した場合は最後の値だけを送る。送信は常に1件ずつ順番に行い、
+// 失敗したセルは（その後に新しい変更がなければ）バッファに戻して再送する。
+const FLUSH_DELAY_MS = 400;       // 最後の操作からこの時間待って送る
+const FLUSH_MAX_WAIT_MS = 2000;   // 操作が続いても、最初の変更からこの時間で送る
+const RETRY_MAX_MS = 30000;       // 再送間隔の上限
+const BATCH_MAX_CELLS = 500;      // 1リクエストで送るセル数の上限（サーバー側と同じ）
+const REJECT_REASONS = {
+    future: '未来日', before_system_start: '開始日前', archived: 'アーカイブ済み', invalid_date: '日付不正',
+    invalid_status: 'ステータス不正', invalid_task: '対象外タスク', invalid_parameters: 'パラメータ不正'
+};
+
+const pendingWrites = new Map();  // セル位置 → {taskkey, day, status, version}
+const inFlightWrites = new Map(); // 送信中のセル位置 → version
+let writeVersion = 0;
+let flushTimer = null;
+let firstPendingAt = null;
+let flushPromise = null;
+let retryDelay = 0;
+
+function queueStatusWrite(btn, status) {
+    const key = `${btn.dataset.task}_${btn.dataset.day}`;
+    renderStatus(btn, status);
+    btn.classList.add('saving');
+    pendingWrites.set(key, {
+        taskkey: Number(btn.dataset.task), day: btn.dataset.day, status, version: ++writeVersion
+    });
+    scheduleFlush();
+}
+
+// 送信前・送信中のセルは、差分同期で古い値に戻さない
+function hasLocalWrite(key) {
+    return pendingWrites.has(key) || inFlightWrites.has(key);
+}
+
+function scheduleFlush(delay) {
+    if (flushPromise) return;  // 送信中なら完了後に続きを送る
+    // 再送待ちの間は、新しい変更があっても再送間隔を縮めない
+    if (delay === undefined && retryDelay > 0 && flushTimer !== null) return;
+    const now = Date.now();
+    if (firstPendingAt === null) firstPendingAt = now;
+    const wait = delay ?? Math.min(FLUSH_DELAY_MS, Math.max(0, firstPendingAt + FLUSH_MAX_WAIT_MS - now));
+    clearTimeout(flushTimer);
+    flushTimer = setTimeout(() => { flushTimer = null; flushWrites(); }, wait);
+}
+
+function flushWrites() {
+    if (flushPromise || pendingWrites.size === 0) return flushPromise;
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    firstPendingAt = null;
+    const batch = Array.from(pendingWrites, ([key, cell]) => ({ key, ...cell })).slice(0, BATCH_MAX_CELLS);
+    batch.forEach(cell => pendingWrites.delete(cell.key));
+    batch.forEach(cell => inFlightWrites.set(cell.key, cell.version));
+
+    flushPromise = sendWriteBatch(batch).finally(() => {
+        batch.forEach(cell => inFlightWrites.delete(cell.key));
+        flushPromise = null;
+        if (pendingWrites.size > 0) scheduleFlush(retryDelay || undefined);
+    });
+    return flushPromise;
+}
+
+async function sendWriteBatch(batch) {
+    let result = null;
+    try {
+        const res = await fetch(CONFIG.batchUpdateUrl, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+                cells: batch.map(({ taskkey, day, status }) => ({ taskkey, day, status }))
+            })
+        });
+        // 4xx はバッチ自体が不正なので再送しない。5xx・通信エラーは再送する
+        if (res.status < 500) result = await res.json();
+    } catch (err) {
+        result = null;
+    }
+
+    if (!result) {
+        // 新しい変更が入っていないセルだけを元の順番のまま戻す
+        batch.forEach(cell => {
+            if (!pendingWrites.has(cell.key)) pendingWrites.set(cell.key, cell);
+        });
+        retryDelay = Math.min(RETRY_MAX_MS, retryDelay ? retryDelay * 2 : 1000);
+        return;
+    }
+    retryDelay = 0;
+
+    const rejected = [];
+    batch.forEach((cell, i) => {
+        const ack = result.success ? result.results[i] : { ok: false, error: result.error };
+        const btn = cellButtons.get(cell.key);
+        if (pendingWrites.has(cell.key)) return;  // より新しい変更が送信待ち
+        if (btn) btn.classList.remove('saving');
+        if (!ack.ok) rejected.push(`${btn ? btn.dataset.taskname : cell.taskkey} ${cell.day}(${REJECT_REASONS[ack.error] || ack.error || ''})`);
+    });
+    if (rejected.length > 0) {
+        alert("保存できなかった変更があります。\n" + rejected.join("\n"));
+        // 却下されたセルはサーバーの値に戻す
+        await reloadRejectedCells();
+    }
+}
+
+// 却下されたセルの表示をサーバーの値に合わせる（差分同期では変化なしのため表全体を取り直す）
+async function reloadRejectedCells() {
+    try {
+        const res = await fetch(CONFIG.gridUrl, { headers: { "Accept": "application/json" } });
+        const grid = await res.json();
+        if (!grid.success) return;
+        document.querySelectorAll('tr.task-row').forEach(tr => {
+            const packed = grid.statuses[tr.dataset.task] || '';
+            grid.days.forEach((day, i) => {
+                const key = `${tr.dataset.task}_${day}`;
+                const btn = cellButtons.get(key);
+                if (btn && !hasLocalWrite(key)) renderStatus(btn, Number(packed.charAt(i) || 0));
+            });
+        });
+    } catch (err) {
+        // 次の差分同期に任せる
+    }
+}
+
+// 送信待ち・送信中の変更をすべて保存し終えるまで待つ（一括変更の前に順序を揃えるため）
+// 保存できずにバッファへ戻った変更が残る場合は例外にする（後から再送されて一括変更を上書きしないよう、呼び出し側で中止する）
+async function drainWrites() {
+    if (flushPromise) await flushPromise;
+    while (pendingWrites.size > 0) {
+        await flushWrites();
+        if (retryDelay > 0) break;  // 送信に失敗した
+    }
+    if (pendingWrites.size > 0) {
+        throw new Error("保存待ちの変更を保存できなかったため、中止しました");
+    }
+}
+
+// ページを離れるときは送信待ちの変更を keepalive で送る（ページ終了後も送信が続く）。
+// 応答は受け取れないので、タブが隠れただけのとき（visibilitychange）は通常の送信を使う
+function flushOnLeave() {
+    if (pendingWrites.size === 0) return;
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    firstPendingAt = null;
+    // keepalive の本文は64KBまでのため、上限件数で切る
+    const cells = Array.from(pendingWrites, ([key, { taskkey, day, status }]) => {
+        const btn = cellButtons.get(key);
+        if (btn) btn.classList.remove('saving');
+        return { taskkey, day, status };
+    }).slice(0, BATCH_MAX_CELLS);
+    pendingWrites.clear();
+    fetch(CONFIG.batchUpdateUrl, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ cells }),
+        keepalive: true
+    }).catch(() => {});
+}
+document.addEventListener('visibilitychange', () => { if (document.hidden) flushWrites(); });
+window.addEventListener('pagehide', flushOnLeave);
@@ -0,0 +1,12 @@
+const toggleBtn = document.getElementById("toggle-report");
+toggleBtn.addEventListener("click", function(){
+    const userDiv = document.getElementById("user-report");
+    const taskDiv = document.getElementById("task-report");
+    if(userDiv.style.display==="none"){
+        userDiv.style.display="block";
+        taskDiv.style.display="none";
+    } else {
+        userDiv.style.display="none";
+        taskDiv.style.display="block";
+    }
+});
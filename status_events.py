@@ -0,0 +1,158 @@
+# status_events.py
+"""
+ステータス変更通知のワーカー内ハブ（SSE 配信用）。
+
+書き込み処理は PostgreSQL の NOTIFY（書き込みと同じトランザクション）で変更を通知し、
+各ワーカーはこのハブが持つ LISTEN 専用接続1本で受け取って、接続中の SSE クライアントの
+キューに配る。ワーカーが何台あっても、どのワーカーで書き込んでも全員に届く。
+
+PostgreSQL 以外（ローカルの SQLite 等）では LISTEN を使わず、同じプロセス内でのみ配る。
+PostgreSQL で listen=False（LISTEN できない接続先しか無い場合）はワーカー間で届かないので、
+available が False になり、配信側（SSE）は使わない。
+
+add_channel_handler() で、同じ LISTEN 接続で別のチャンネル（管理者の変更など）も受け取れる。
+ハンドラーには NOTIFY のペイロードを渡し、（再）接続時は取りこぼしに備えて None を渡す。
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "taskstatus_changes"
+# NOTIFY のペイロード上限（8000バイト）に余裕を持たせた値
+MAX_PAYLOAD_BYTES = 7000
+
+
+class StatusEventHub:
+    def __init__(self, database_url, channel=CHANNEL, poll_seconds=30, subscriber_queue_size=100, listen=True):
+        url = make_url(database_url)
+        is_postgresql = url.get_backend_name() == "postgresql"
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self.subscriber_queue_size = subscriber_queue_size
+        self.uses_listen = listen and is_postgresql
+        self.available = self.uses_listen or not is_postgresql
+        # psycopg2 にそのまま渡せる形（ドライバ指定を外した URI）
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._subscribers = set()
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def add_channel_handler(self, channel, handler):
+        """channel への NOTIFY を受け取ったら handler(payload) を呼ぶ（start() より前に登録する）"""
+        self._handlers[channel] = handler
+
+    def start(self):
+        """LISTEN 接続を開く（2回目以降は何もしない）。購読が無くてもチャンネルのハンドラーを動かすために呼ぶ"""
+        if not self.uses_listen or self._listener is not None:
+            return
+        with self._lock:
+            self._start_listener()
+
+    def _start_listener(self):
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen_forever, name="status-event-listener", daemon=True)
+            self._listener.start()
+
+    # --- 購読 ---
+    def subscribe(self):
+        """イベント（dict）を受け取るキューを返す。LISTEN 接続は最初の購読時に開く"""
+        q = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+            if self.uses_listen:
+                self._start_listener()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    # --- 配信 ---
+    @staticmethod
+    def encode(event):
+        """
+        NOTIFY に載せる JSON を作る。上限を超える場合は宛先（admins）を外して全員宛てにする
+        （受け取った側は差分同期で取り直すだけなので、宛先が広がっても結果は変わらない）
+        """
+        payload = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            payload = json.dumps(dict(event, admins=None), ensure_ascii=False, separators=(",", ":"))
+        return payload
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("status event: invalid payload %r", payload[:200])
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # 詰まっているクライアントには落とす（次のイベントか定期同期で追いつく）
+                pass
+
+    def _call_handler(self, channel, payload):
+        try:
+            self._handlers[channel](payload)
+        except Exception as e:
+            logger.error("status event handler error (channel=%s): %s", channel, e)
+
+    # --- LISTEN ループ ---
+    def _listen_forever(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                channels = [self.channel, *self._handlers]
+                with conn.cursor() as cur:
+                    for channel in channels:
+                        cur.execute(f'LISTEN "{channel}"')
+                logger.info("status event listener connected (channels=%s)", ",".join(channels))
+                backoff = 1
+                # 再接続時は取りこぼしがあり得るので、購読者全員に取り直しを促す
+                self.dispatch(json.dumps({"seq": None, "admins": None}))
+                for channel in self._handlers:
+                    self._call_handler(channel, None)
+                while True:
+                    if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                        # 無通知が続いても接続が生きているか確認する
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT 1")
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.channel in self._handlers:
+                            self._call_handler(notify.channel, notify.payload)
+                        else:
+                            self.dispatch(notify.payload)
+            except Exception as e:
+                logger.error("status event listener error: %s (retry in %ss)", e, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,50 @@
+# status_matrix.py
+"""
+タスク × 日付 のステータス表（ダッシュボードの表示期間など）のコンパクトな保持形式。
+
+タスクごとに期間の日数分の bytearray を1本持ち、i 番目のバイトが start_day + i 日目の
+ステータスを ASCII の数字（b"0"〜b"3"）で表す。日付やステータスごとの Python オブジェクトを作らないので、
+super_admin の全タスク × 1か月でもタスク数分の小さなバイト列だけで済む。
+
+数字のまま持っているので、グリッドAPIのステータス数字列はバイト列をそのまま文字列にするだけで作れる。
+
+用途はダッシュボードの表示（エンコード）だけで、件数の集計は持たない。
+レポートの 済/休/無 件数は app.py の load_month_counts（月次ロールアップまたはDB側の GROUP BY）が正とする。
+"""
+
+DEFAULT_STATUS = ord("0")  # 記録がないセルは 0:未
+
+
+class StatusMatrix:
+    def __init__(self, start_day, end_day):
+        """start_day〜end_day（両端含む）の表を作る"""
+        self.start_day = start_day
+        self.num_days = (end_day - start_day).days + 1
+        self._blank = bytes([DEFAULT_STATUS]) * self.num_days
+        self._rows = {}
+
+    @classmethod
+    def from_rows(cls, start_day, end_day, rows):
+        """DBの (task_id, date, status) の行から作る（期間外の日付は無視する）"""
+        matrix = cls(start_day, end_day)
+        for task_id, day, status in rows:
+            matrix.set(task_id, day, status)
+        return matrix
+
+    def set(self, taskkey, day, status):
+        offset = (day - self.start_day).days
+        if not 0 <= offset < self.num_days:
+            return
+        row = self._rows.get(taskkey)
+        if row is None:
+            row = self._rows[taskkey] = bytearray(self._blank)
+        row[offset] = DEFAULT_STATUS + (status or 0)  # status 列は NULL を許すので 0:未 として扱う
+
+    def row(self, taskkey):
+        """タスクの期間全体のステータス（ASCII数字のバイト列）"""
+        row = self._rows.get(taskkey)
+        return self._blank if row is None else bytes(row)
+
+    def encoded(self, taskkey):
+        """グリッドAPI用のステータス数字列（例: "0120"）"""
+        return self.row(taskkey).decode("ascii")
@@ -0,0 +1,72 @@
+# tests/conftest.py
+"""
+SQLite のテスト用DBで app を読み込む（app.py は import 時に DATABASE_URL から接続先を決めるため、先に設定する）。
+本番の PostgreSQL 固有の処理（COPY・アドバイザリロック・LISTEN）は通らない。
+"""
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="task_manager_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("INSTRUMENTATION", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+
+import app as task_manager  # noqa: E402
+
+USERS = [
+    # (userid, name, group, admin_id)
+    (1, "u1", "G1", "a1"),
+    (2, "u2", "G1", "a1"),
+    (3, "u3", "G2", "root"),
+]
+TASK_NAMES = ["t1", "t2"]
+SEED_START = date(2026, 1, 1)
+SEED_DAYS = 90
+
+
+@pytest.fixture()
+def app():
+    """テストごとに空のDBを作り、3ユーザー × 2タスク × 90日分のステータスを入れる"""
+    flask_app = task_manager.app
+    db = task_manager.db
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(task_manager.Admin(account_id="root", name="root", account_password="pw", role="super_admin"))
+        db.session.add(task_manager.Admin(account_id="a1", name="a1", account_password="pw", role="admin"))
+        for userid, name, group, admin_id in USERS:
+            db.session.add(task_manager.User(userid=userid, name=name, group=group, admin_id=admin_id))
+        for name in TASK_NAMES:
+            db.session.add(task_manager.TaskName(name=name))
+        db.session.flush()
+        for userid, *_ in USERS:
+            for name in TASK_NAMES:
+                db.session.add(task_manager.Task(user_id=userid, name=name))
+        db.session.flush()
+        for task in task_manager.Task.query.all():
+            for i in range(SEED_DAYS):
+                # 記録なしの日も混ぜる（(taskkey + i) % 5 == 4 は行を作らない）
+                if (task.taskkey + i) % 5 != 4:
+                    db.session.add(task_manager.TaskStatus(
+                        user_id=task.user_id, task_id=task.taskkey,
+                        date=SEED_START + timedelta(days=i), status=(task.taskkey * 7 + i) % 4, seq=0
+                    ))
+        task_manager.rebuild_monthly_rollup()
+        db.session.commit()
+    task_manager.admin_identity_cache.invalidate()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture()
+def client(app):
+    """super_admin（root）でログイン済みのテストクライアント"""
+    client = app.test_client()
+    client.post("/login", data={"account_id": "root", "password": "pw"})
+    return client
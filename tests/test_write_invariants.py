@@ -0,0 +1,268 @@
+# tests/test_write_invariants.py
+"""
+ステータス書き込みの不変条件:
+  - どの書き込み経路の後でも、月次ロールアップ（taskstatus_monthly）は taskstatus からの全再集計と一致する
+  - 変更番号（seq）は書き込みのたびに増え、差分同期で変更したセルだけが返る
+  - CSVインポートは同じセルの後の行を優先し、値が変わらないセルは書き込まない
+  - アーカイブ済みの月には書き込めず、全再集計でもその月の集計は残る
+"""
+import io
+from datetime import date, datetime, timezone
+
+import app as task_manager
+from app import db, TaskStatus, TaskStatusMonthly, ArchivedMonth
+
+
+def rollup_rows():
+    """件数が0でないロールアップ行（差分加算では0の行が残ることがあるため除く）"""
+    return sorted(
+        row for row in db.session.query(
+            TaskStatusMonthly.task_id, TaskStatusMonthly.year, TaskStatusMonthly.month,
+            TaskStatusMonthly.completed, TaskStatusMonthly.rest, TaskStatusMonthly.none_count
+        )
+        if any(row[3:])
+    )
+
+
+def assert_rollup_matches_rebuild(app):
+    with app.app_context():
+        incremental = rollup_rows()
+        task_manager.rebuild_monthly_rollup()
+        db.session.commit()
+        assert incremental == rollup_rows()
+
+
+def status_of(app, taskkey, day):
+    with app.app_context():
+        row = db.session.query(TaskStatus.status).filter_by(task_id=taskkey, date=day).first()
+        return row and row[0]
+
+
+def max_seq(app):
+    with app.app_context():
+        return task_manager.current_change_cursor()
+
+
+def test_batch_update_keeps_rollup(app, client):
+    cells = [
+        {"taskkey": 1, "day": "2026-01-04", "status": 1},
+        {"taskkey": 1, "day": "2026-01-04", "status": 3},  # 同じセルは後の値
+        {"taskkey": 2, "day": "2026-01-05", "status": 0},
+        {"taskkey": 3, "day": "2026-02-28", "status": 2},
+        {"taskkey": 4, "day": "2026-03-31", "status": 1},
+        {"taskkey": 5, "day": "2026-04-02", "status": 3},  # 記録のない月
+        {"taskkey": 999, "day": "2026-01-05", "status": 1},
+    ]
+    response = client.post("/update_status_batch", json={"cells": cells})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["ok"] for r in results] == [True] * 6 + [False]
+    assert results[-1]["error"] == "invalid_task"
+    assert status_of(app, 1, date(2026, 1, 4)) == 3
+    assert_rollup_matches_rebuild(app)
+
+
+def test_bulk_update_keeps_rollup(app, client):
+    days = [f"2026-02-{d:02d}" for d in range(1, 29)]
+    response = client.post("/update_status_bulk", json={
+        "status": 1, "days": days,
+        "users": [{"user_id": 1, "task_ids": [1, 2]}, {"user_id": 2, "task_ids": [3], "days": ["2026-03-01"]}],
+    })
+    assert response.status_code == 200
+    assert response.get_json()["results"]["1"]["updated"] == 56
+    assert status_of(app, 2, date(2026, 2, 14)) == 1
+    assert_rollup_matches_rebuild(app)
+
+
+def test_bulk_update_rejects_malformed_lists_and_merges_duplicate_users(app, client):
+    for payload in (
+        {"status": 1, "days": 5, "users": [{"user_id": 1, "task_ids": [1]}]},
+        {"status": 1, "days": ["2026-02-01"], "users": [{"user_id": 1, "task_ids": 1}]},
+        {"status": 1, "users": [{"user_id": 1, "task_ids": [1], "days": "2026-02-01"}]},
+        {"status": 1, "days": ["2026-02-01"], "users": {"user_id": 1}},
+    ):
+        assert client.post("/update_status_bulk", json=payload).status_code == 400
+
+    response = client.post("/update_status_bulk", json={
+        "status": 2,
+        "users": [
+            {"user_id": 1, "task_ids": [1], "days": ["2026-02-01", "2030-01-01"]},
+            {"user_id": 1, "task_ids": [2, 999], "days": ["2026-02-02"]},
+        ],
+    })
+    assert response.status_code == 200
+    result = response.get_json()["results"]["1"]
+    assert result["updated"] == 2
+    assert result["rejected_days"] == [{"day": "2030-01-01", "reason": "future"}]
+    assert result["rejected_tasks"] == [999]
+    assert_rollup_matches_rebuild(app)
+
+
+def test_dashboard_post_keeps_rollup(app, client):
+    response = client.post("/dashboard?view=day&week=2026-01-10", data={
+        "task_1_2026-01-10": "2", "task_6_2026-01-10": "0", "task_x": "1", "task_2_2026-01-10": "9",
+    })
+    assert response.status_code == 302
+    assert status_of(app, 1, date(2026, 1, 10)) == 2
+    assert_rollup_matches_rebuild(app)
+
+
+def test_single_update_keeps_rollup(app, client):
+    for status in (1, 2, 3, 0, 1):
+        assert client.post("/update_status", json={"taskkey": 6, "day": "2026-03-15", "status": status}).get_json()["success"]
+    assert_rollup_matches_rebuild(app)
+
+
+def test_admin_cannot_write_other_admins_users(app):
+    client = app.test_client()
+    client.post("/login", data={"account_id": "a1", "password": "pw"})
+    # taskkey 5, 6 は root 担当の u3 のタスク
+    results = client.post("/update_status_batch", json={"cells": [
+        {"taskkey": 1, "day": "2026-01-04", "status": 2},
+        {"taskkey": 5, "day": "2026-01-04", "status": 2},
+    ]}).get_json()["results"]
+    assert [r["ok"] for r in results] == [True, False]
+    assert_rollup_matches_rebuild(app)
+
+
+def test_seq_increases_and_changes_return_written_cells(app, client):
+    cursor = max_seq(app)
+    client.post("/update_status_batch", json={"cells": [{"taskkey": 1, "day": "2026-01-20", "status": 1}]})
+    first = max_seq(app)
+    client.post("/update_status_batch", json={"cells": [{"taskkey": 2, "day": "2026-01-21", "status": 2}]})
+    second = max_seq(app)
+    assert cursor < first < second
+
+    changes = client.get(f"/api/dashboard/changes?view=month&week=2026-01-15&since={first}").get_json()
+    assert changes["changes"] == [[2, "2026-01-21", 2]]
+    assert changes["cursor"] == second
+
+
+def import_csv(app, text, actor=None):
+    with app.app_context():
+        summary = task_manager.import_task_statuses(io.StringIO(text), actor=actor)
+        db.session.commit()
+        return summary
+
+
+def test_import_keeps_rollup_and_last_row_wins(app):
+    text = "\n".join([
+        "ユーザーID,タスク,日付,ステータス",
+        "1,t1,2026-01-03,1",
+        "1,t1,2026-01-03,休",         # 同じセルは後の行
+        "2,t2,2026/2/9,3",            # スラッシュ区切り
+        "3,t1,2026-03-30,0",
+        "3,t2,2026-04-01,1",          # 記録のない月
+        "1,no-such-task,2026-01-03,1",
+        "1,t1,2099-01-01,1",
+        "1,t1,2026-01-03,7",
+    ])
+    summary = import_csv(app, text)
+    assert summary["staged"] == 5
+    assert summary["cells"] == 4
+    assert summary["rejected_by_reason"] == {"unknown_task": 1, "future": 1, "invalid_status": 1}
+    assert status_of(app, 1, date(2026, 1, 3)) == 2
+    assert_rollup_matches_rebuild(app)
+
+
+def test_reimporting_export_writes_nothing(app, client):
+    exported = client.get("/export/status_history.csv?start=2026-01-01&end=2026-03-31").get_data(as_text=True)
+    cursor = max_seq(app)
+    summary = import_csv(app, exported.lstrip("﻿"))
+    assert summary["rejected"] == 0
+    assert summary["written"] == 0
+    assert summary["unchanged"] == summary["cells"] > 0
+    assert max_seq(app) == cursor
+    assert_rollup_matches_rebuild(app)
+
+
+def archive_month(app, year, month):
+    """maintain_partitions.py の切り離しと同じ状態にする（ロールアップを残して行を消す）"""
+    with app.app_context():
+        task_manager.rebuild_monthly_rollup(year, month)
+        db.session.add(ArchivedMonth(year=year, month=month, archived_at=datetime.now(timezone.utc)))
+        first_day = date(year, month, 1)
+        next_first_day = date(year + (month == 12), month % 12 + 1, 1)
+        TaskStatus.query.filter(TaskStatus.date >= first_day, TaskStatus.date < next_first_day).delete()
+        db.session.commit()
+        return [row for row in rollup_rows() if (row[1], row[2]) == (year, month)]
+
+
+def test_archived_month_rejects_writes_and_survives_rebuild(app, client):
+    archived = archive_month(app, 2026, 2)
+    assert archived
+
+    results = client.post("/update_status_batch", json={"cells": [
+        {"taskkey": 1, "day": "2026-02-10", "status": 1},
+    ]}).get_json()["results"]
+    assert results[0]["error"] == "archived"
+    assert not client.post("/update_status", json={"taskkey": 1, "day": "2026-02-10", "status": 1}).get_json()["success"]
+    summary = import_csv(app, "ユーザーID,タスク,日付,ステータス\n1,t1,2026-02-10,1\n")
+    assert summary["rejected_by_reason"] == {"archived": 1}
+
+    with app.app_context():
+        task_manager.rebuild_monthly_rollup()
+        db.session.commit()
+        assert [row for row in rollup_rows() if (row[1], row[2]) == (2026, 2)] == archived
+
+
+def test_import_validation_does_not_query_during_staging(app, monkeypatch):
+    """
+    PostgreSQL では行の検証が COPY の実行中に行われ、同じ接続で別のクエリを出すと COPY が中断される。
+    流し込み中に一時テーブルへの INSERT 以外の文が出ていないことを確かめる。
+    """
+    from sqlalchemy import event
+
+    stray = []
+    staging = {"active": False}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if staging["active"] and not statement.lstrip().upper().startswith("INSERT INTO TASKSTATUS_IMPORT"):
+            stray.append(statement)
+
+    original = task_manager.stage_import_rows
+
+    def stage_and_watch(connection, rows):
+        staging["active"] = True
+        try:
+            return original(connection, rows)
+        finally:
+            staging["active"] = False
+
+    monkeypatch.setattr(task_manager, "stage_import_rows", stage_and_watch)
+    archive_month(app, 2026, 2)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            summary = task_manager.import_task_statuses(io.StringIO(
+                "ユーザーID,タスク,日付,ステータス\n1,t1,2026-01-03,1\n1,t1,2026-02-10,1\n2,t2,2026-03-03,2\n"
+            ))
+            db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert stray == []
+    assert summary["staged"] == 2
+    assert summary["rejected_by_reason"] == {"archived": 1}
+
+
+def test_write_racing_import_keeps_rollup(app, client, monkeypatch):
+    """
+    インポートはタスク行をロックしないので、書き込みが変更番号を払い出して待っている間に
+    同じセルへのインポートがコミットされることがある。その場合も旧ステータスはインポート後の値で読む。
+    """
+    original = task_manager.next_change_seq
+    raced = {"done": False}
+
+    def seq_after_concurrent_import():
+        if not raced["done"]:
+            raced["done"] = True
+            # 書き込み側が変更番号のロックを待っている間に、別セッションのインポートがコミットされる
+            import_csv(app, "ユーザーID,タスク,日付,ステータス\n1,t1,2026-01-12,3\n")
+        return original()
+
+    monkeypatch.setattr(task_manager, "next_change_seq", seq_after_concurrent_import)
+    response = client.post("/update_status_batch", json={"cells": [{"taskkey": 1, "day": "2026-01-12", "status": 2}]})
+    assert response.get_json()["results"][0]["ok"]
+    assert raced["done"]
+    assert status_of(app, 1, date(2026, 1, 12)) == 2
+    assert_rollup_matches_rebuild(app)